@@ -25,7 +25,7 @@
 # 第一次開機請至 https://github.com/206cc/PicoBETH?tab=readme-ov-file#first-boot 觀看如何設定 HX、CC、FT 參數
 # 基本參數(如CFG_NAME內有儲存參數值會以的存檔的設定為主)
 HX711_CAL = 20.00    # HX711張力感應器校正系數，第一次使用或有更換張力傳感器、HX711電路板時務必重新校正一次
-CORR_COEF_AUTO = 1   # 自我學習CC張力系數開關
+CORR_COEF_AUTO = 1   # 自我學習開關，由每次拉線學習線材剛性及停止延遲，自動調整CC張力系數及FT微調步數
 LB_KG_SELECT = 0     # 磅或公斤的設定，0=皆可設定，1=只設定磅，2=只設定公斤
 DEFAULT_LB = 18.0    # (LB)預設磅數
 PRE_STRECH = 10      # (%)預拉Pre-Strech
@@ -48,47 +48,98 @@ CP_SW = 1            # 自動恆拉預設 0=關閉，1=只設啟用
 ABORT_GRAM = 20000   # (G)最大中斷公克(約44磅)
 AUTO_SAVE_SEC = 1.5  # (Second)自動儲存設定張力秒數
 LOG_MAX = 50         # 最大LOG保留記錄(請勿太大，以免記憶體耗盡無法開機)
+TS_FILTER = 0        # 張力濾波器 0=無，1=移動平均，2=移動中位數，3=EMA，4=卡爾曼
+PREDICT_STOP = 0     # 預測停止 0=關閉，1=依張力斜率預估到磅時提前停止馬達，減少過衝
+PREDICT_LEAD = 1     # (取樣數)預測停止時往前預估的取樣週期數(補償取樣延遲)
+MOTO_PIO = 1         # 步進脈波 0=Python迴圈逐步輸出，1=PIO產生(脈波頻率精準且更高)
+MOTO_PROFILE = 2     # 加減速曲線(MOTO_PIO=1時) 0=固定速度，1=梯形，2=S曲線
+MOTO_ACCEL = 80000   # (步/秒^2)最大加速度
+MOTO_JERK = 4000000  # (步/秒^3)S曲線最大加加速度
+APPROACH_PCT = 10    # (%)接近到磅時減速的範圍，剩餘張力小於目標張力的此%數起依剩餘張力減速，到磅時降到起始速度，0=關閉
+FAST_BOOT = 1        # 快速開機 0=每次開機量測完整行程，1=復位在預期位置碰到前限位開關時沿用存檔行程(開機時按住設定鍵完整量測)
+PARK_MODE = 0        # 拉線結束後復位 0=退回前限位開關，1=只退到張力起點前PARK_MARGIN步(長按取消鍵完整復位)
+PROF_ON = 0          # 效能計時 0=關閉，1=開機即開啟(設定頁LOG位置按上鍵進入計時畫面切換)
                     
 import time, _thread, machine
+from array import array
 from machine import I2C, Pin
 from src.hx711 import hx711          # from https://github.com/endail/hx711-pico-mpy
 from src.pico_i2c_lcd import I2cLcd  # from https://github.com/T-622/RPI-PICO-I2C-LCD
+from src.filters import passthrough, moving_average, moving_median, ema, kalman
+from src.tare import auto_zero
+from src.calib import raw_to_gram, gram_scale
+from src.prof import profiler
+from src.health import sample_health
+from src.stepper import pio_stepper
+from src.motion import ramp, approach
+from src.mover import mover, LIMIT, TENSION
+from src.gpio import port
+from src.learn import string_model
+from src.shadow import lcd_shadow
+from src.display import display, CURSOR_OFF, CURSOR_ON, CURSOR_BLINK
 
 # 其它參數(請勿更動)
 VERSION = "1.94"
 VER_DATE = "2024-03-14"
-SAVE_CFG_ARRAY = ['DEFAULT_LB','PRE_STRECH','CORR_COEF','MOTO_STEPS','HX711_CAL','TENSION_COUNT','BOOT_COUNT', 'LB_KG_SELECT','CP_SW','FT_ADD','CORR_COEF_AUTO','KNOT','MOTO_MAX_STEPS'] # 存檔變數
-MENU_ARR = [[4,0],[4,1],[4,2],[5,2],[7,2],[8,2],[15,0],[16,0],[15,1],[16,1],[18,1],[19,1],[11,2],[19,3]] # 設定選單陣列
+SAVE_CFG_ARRAY = ['DEFAULT_LB','PRE_STRECH','CORR_COEF','MOTO_STEPS','HX711_CAL','TENSION_COUNT','BOOT_COUNT', 'LB_KG_SELECT','CP_SW','FT_ADD','CORR_COEF_AUTO','KNOT','MOTO_MAX_STEPS','TS_FILTER','MOTO_POS','MOTO_TAKEUP'] # 存檔變數
+MENU_ARR = [[4,0],[4,1],[4,2],[5,2],[7,2],[8,2],[15,0],[16,0],[15,1],[16,1],[18,1],[19,1],[19,2],[19,3]] # 設定選單陣列
 UNIT_ARR = ['LB&KG', 'LB', 'KG']
 ONOFF_ARR = ['Off', 'On ']
 MA_ARR = ['M', 'A']
 ML_ARR = ['N', 'L']
 PSKT_ARR = ['PS', 'KT']
+FILTER_ARR = ['-', 'A', 'M', 'E', 'K'] # 張力濾波器代號
 TS_LB_ARR = [[4,0],[5,0],[7,0]] # 磅調整陣列
 TS_KG_ARR = [[4,1],[5,1],[7,1]] # 公斤調整陣列
 TS_KT     = [[14,0]]              # 打結鍵切換
 TS_PS_ARR = [[17,0],[18,0]]     # 預拉調整陣列
 MOTO_FORW_W = [[1, 0, 1, 0],[0, 1, 0, 0],[0, 1, 1, 1],[1, 0, 1, 0]] # 步進馬達正轉參數
 MOTO_BACK_W = [[0, 1, 0, 1],[1, 0, 0, 1],[1, 0, 1, 0],[0, 1, 1, 0]] # 步進馬達反轉參數
+MOTO_HOLD_US = 5        # (us)MOTO_PIO=0時每個相位最短維持時間(TB6600 PUL脈波寬度至少2.5us，DIR需先穩定)
+HX711_BUF_LEN = 16      # HX711取樣環形緩衝區長度(需大於PIO RX FIFO深度4)
+HX711_RATE = hx711.rate.rate_80 # HX711輸出速率(依RATE腳位接線，10或80SPS)
+HX711_SPS_MIN = 80      # (%)實際取樣率低於HX711_RATE的此百分比，或停止取樣時，立即中斷馬達移動
 MOTO_MAX_STEPS = 1000000
-MOTO_RS_STEPS = 2000    # 滑台復位時感應到前限位開關時退回的步數，必需退回到未按壓前限位開關的程度
+MOTO_HOME_SLOW = 200    # 滑台復位時高速退到前限位開關前此步數，再以低速靠上前限位開關
+PARK_RISE_G = 500       # (G)拉線時張力超過此值的位置記為張力起點
+PARK_MARGIN = 2000      # PARK_MODE=1時停在張力起點前的步數
+PARK_HOME_MS = 1000     # (MS)PARK_MODE=1時長按取消鍵此時間完整復位
 MOTO_SPEED_V1 = 0.0001  # (Second)步進馬達高速
 MOTO_SPEED_V2 = 0.001   # (Second)步進馬達低速
+MOTO_POLL_US = 500      # (US)PIO步進移動中檢查停止條件的間隔
+MOTO_START_HZ = 1000    # (步/秒)加減速曲線的起始及結束速度，馬達可直接起動的速度
 TS_INFO_MS = 100        # (MS)主畫面張力更新顯示毫秒
-FT_SUB_COEF = 0.5       # 減少磅數微調時步進馬達的補償系數
+LCD_FRAME_MS = 50       # (MS)畫面更新間隔，核心1每隔此時間送出有變動的字元
+BOOT_SPLASH_MS = 1000   # (MS)快速開機時開機畫面最短顯示毫秒
+BOOT_TARE_MS = 1000     # (MS)快速開機時開機畫面後最多再等待歸零的毫秒
+TAKEUP_MAX = 200        # 反轉空行程學習的最大步數
+FT_STEP_G = 25          # (G)自我學習時每次微調的張力變化，FT=此值/線材剛性
+STRING_SETTLE_N = 3     # 到磅停止後等待的取樣數，以此時的張力學習停止延遲
+TARE_STABLE_G = 20      # (G)滑台停在待機位置時，讀值變動小於此值才追蹤零點漂移
+TARE_TRACK_G = 200      # (G)零點誤差小於此值才自動追蹤，超過則需重新歸零
+TARE_SETTLE_S = 10      # (Second)讀值穩定超過此秒數才開始追蹤零點漂移
+TARE_DRIFT_G = 2        # (G/分鐘)零點追蹤的最大速度，持續存在的實際負載(夾住的線)不會被當成漂移
+CAL_TABLE_NAME = "hx711_cal.cfg" # 多點校正表檔名(無此檔則使用HX711_CAL單一系數)
+PROF_FUNCS = ['forward', 'backward', 'show_lcd', 'tension_info', 'config_save'] # 效能計時的函式
+PROF_NARGS = [4, 4, 4, 1, 0] # PROF_FUNCS各函式的參數個數(計時版本以固定參數呼叫，不配置記憶體)
 BOTTON_SLEEP = 0.1      # (Second)按鍵等待秒數
 CORR_COEF = 1.00        # 張力系數
-SMART = 0               # 自我修正FT&CC參數
 
 ## 步進馬達
 IN1 = machine.Pin(4, machine.Pin.OUT) # 接 PUL-
 IN2 = machine.Pin(5, machine.Pin.OUT) # 接 PUL+
 IN3 = machine.Pin(2, machine.Pin.OUT) # 接 DIR-
 IN4 = machine.Pin(3, machine.Pin.OUT) # 接 DIR+
+MOTO_PORT = port([4, 5, 2, 3], hold_us=MOTO_HOLD_US) # IN1~IN4，一次暫存器寫入同時切換
+MOTO_FORW_M = MOTO_PORT.table(MOTO_FORW_W)  # 正轉相位的暫存器位元
+MOTO_BACK_M = MOTO_PORT.table(MOTO_BACK_W)  # 反轉相位的暫存器位元
+STEPPER = pio_stepper(IN2) # PIO步進脈波產生器(MOTO_PIO=1時PUL+由PIO輸出)
+MOTO_RAMPS = {}            # 加減速曲線，依速度計算一次後重複使用
 
 # 滑軌限位前後限位感應開關
 MOTO_SW_FRONT = Pin(6, Pin.IN, Pin.PULL_DOWN)  # 滑軌前限位感應開關
 MOTO_SW_REAR = Pin(7, Pin.IN, Pin.PULL_DOWN)   # 滑軌後限位感應開關
+MOVER = mover(STEPPER, IN3, IN4, MOTO_SW_REAR, MOTO_SW_FRONT) # 非阻塞移動(MOTO_PIO=1時)，限位及到磅在背景停止
 
 # 功能按鍵
 BOTTON_HEAD = Pin(8, Pin.IN, Pin.PULL_DOWN)     # 啟動按鍵(珠夾頭)
@@ -106,11 +157,16 @@ BOTTON_LIST = {"BOTTON_HEAD":0,
                "BOTTON_LEFT":0,
                "BOTTON_RIGHT":0}                # 按鈕列表
 BOTTON_CLICK_MS = 500                           # (MS)按鈕點擊毫秒
+BOTTON_SCAN_MS = 5                              # (MS)按鈕掃描間隔毫秒
 
 # LED參數
 LED_GREEN = Pin(19, machine.Pin.OUT)  # 綠
 LED_YELLOW = Pin(20, machine.Pin.OUT) # 黃
 LED_RED = Pin(21, machine.Pin.OUT)    # 紅
+LED_PORT = port([19, 20, 21])         # 綠黃紅，一次暫存器寫入同時切換
+LED_G = LED_PORT.bit(0)
+LED_Y = LED_PORT.bit(1)
+LED_R = LED_PORT.bit(2)
 
 # 蜂鳴器
 BEEP = Pin(22, machine.Pin.OUT)
@@ -122,9 +178,13 @@ MOTO_MOVE = 0
 MOTO_BACK = 0
 MOTO_WAIT = 0
 MOTO_STEPS = 0
+MOTO_POS = -1       # 滑台位置(步，前限位開關觸發點為0)，-1=未知
+MOTO_POS_ERR = 0    # 最近一次碰到限位開關時計算位置與開關位置的差(步)
+MOTO_SLACK = -1     # 最近一次拉線張力起點的滑台位置(步)，-1=未知
+MOTO_DIR = -1       # 最近一次移動方向，0=張力增加，1=張力減少，-1=未知
+MOTO_TAKEUP = 0     # 方向反轉後張力不變的步數(導螺桿背隙及線材遲滯)，微調反轉時預先補上
 CURSOR_XY_TMP = 0
 CURSOR_XY_TS_TMP = 1
-HX711_I = 0
 TENSION_COUNT = 0
 BOOT_COUNT = 0
 TIMER = 0
@@ -135,6 +195,12 @@ TS_ARR = []
 LOGS = []
 TENSION_MON_TMP = 0
 KNOT_FLAG = 0
+HX711_BUF_I = 0
+HX711_N = 0
+HX711_LOCK = _thread.allocate_lock() # hx711_irq()同時只執行一份，tare_restart()也取得此鎖
+MOTO_PARK = 0       # 滑台停在前限位待機位置(只由moto_goto_standby設定)，此時才追蹤零點漂移
+TARE = None
+HX711_FAULT = 0
 
 # 2004 i2c LCD 螢幕參數設定
 I2C_ADDR     = 0x27
@@ -142,15 +208,27 @@ I2C_NUM_ROWS = 4
 I2C_NUM_COLS = 20
 i2c = I2C(0, sda=machine.Pin(0), scl=machine.Pin(1), freq=400000)
 lcd = I2cLcd(i2c, I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS)
+LCD_SHADOW = lcd_shadow(lcd, I2C_NUM_ROWS, I2C_NUM_COLS) # 畫面內容副本，只送出有變動的字元
+DISPLAY = display(LCD_SHADOW, LCD_FRAME_MS) # 畫面服務，寫入只更新記憶體中的畫面，由核心1在背景送出(之後不直接操作lcd)
 
 # HX711 張力傳感器參數
+HX711_BUF = array('i', [0] * HX711_BUF_LEN) # 取樣環形緩衝區(預先配置，取樣路徑不配置記憶體)
+TS_CONV = raw_to_gram(HX711_CAL) # HX711原始值轉公克(整數乘法及位移，不使用浮點)
+TS_LB = gram_scale(0.0022)       # 公克轉0.1磅(整數乘法及位移，張力顯示不配置記憶體)
+TS_KG = gram_scale(0.001)        # 公克轉0.1公斤
+TS_FILTERS = [passthrough(), moving_average(4), moving_median(5), ema(2), kalman(4, 64)] # 張力濾波器(依FILTER_ARR順序預先配置)
+PROF = profiler(PROF_FUNCS + ['monitor']) # 效能計時(最後一項為核心1監控迴圈一次)
+PROF_MONITOR = len(PROF_FUNCS)
+PROF_ORIG = {}
 hx = hx711(Pin(27), Pin(26))
 hx.set_power(hx711.power.pwr_up)
 hx.set_gain(hx711.gain.gain_128)
 hx.set_power(hx711.power.pwr_down)
 hx711.wait_power_down()
 hx.set_power(hx711.power.pwr_up)
-hx711.wait_settle(hx711.rate.rate_80)
+hx711.wait_settle(HX711_RATE)
+HEALTH = sample_health(hx711.get_rate_sps(HX711_RATE), HX711_SPS_MIN) # 取樣率、間隔抖動、飽和監控
+STRING = string_model() # 線材模型，由每次拉線學習剛性(G/步)及停止延遲(步)
 
 # 參數讀取
 def config_read():
@@ -183,6 +261,25 @@ def config_save():
     except OSError:  # failed
        pass
 
+# 多點校正表讀取，每行格式: HX設為20.00時顯示的公克,外部拉力計量測的公克
+def cal_table_read():
+    try:
+        fp = open(CAL_TABLE_NAME, "r")
+        points = [(0, 0)]
+        line = fp.readline()
+        while line:
+            cal = line.strip().split(",")
+            if len(cal) == 2:
+                points.append((int(float(cal[0]) * 100), int(float(cal[1]))))
+                
+            line = fp.readline()
+        
+        fp.close()
+        if len(points) > 1:
+            TS_CONV.set_table(points)
+    except (OSError, ValueError):  # failed
+       pass
+
 # LOG儲存
 def logs_save(log_str, flag):
     try:
@@ -226,46 +323,143 @@ def tension_info(tension):
     if tension is None:
         tension = TENSION_MON
     
-    show_lcd("{: >4.1f}".format(tension * 0.0022), 9, 0, 4)
-    show_lcd("{: >4.1f}".format(tension / 1000), 9, 1, 4)
-    show_lcd("{: >5d}G".format(tension), 14, 3, 6)
+    show_num(TS_LB.convert(tension), 9, 0, 4, 1)
+    show_num(TS_KG.convert(tension), 9, 1, 4, 1)
+    show_num(tension, 14, 3, 5)
+    show_lcd("G", 19, 3, 1)
     return tension
     
-# 步進馬達旋轉
-def setStep(in_w):
-    IN1.value(in_w[0])
-    IN2.value(in_w[1])
-    IN3.value(in_w[2])
-    IN4.value(in_w[3])
+# PIO步進脈波移動(不等待)，傳回移動handle，direction 0=張力增加，1=張力減少
+# 碰到該方向的限位開關時PIO自動停止，張力超過stop_g時由取樣中斷立即停止，有slow時接近stop_g由取樣中斷減速
+def moto_pio_move(steps, delay, direction, stop_g=0, slow=None):
+    IN1.value(0)
+    return MOVER.start(direction, steps, delay, moto_ramp(delay), stop_g, (), slow)
+
+# 取得該速度的加減速曲線
+def moto_ramp(delay):
+    if MOTO_PROFILE == 0:
+        return None
+    
+    if delay not in MOTO_RAMPS:
+        MOTO_RAMPS[delay] = ramp(pio_stepper.period_us(delay), MOTO_PROFILE, MOTO_START_HZ, MOTO_ACCEL, MOTO_JERK)
+        
+    return MOTO_RAMPS[delay]
+
+# 取得接近到磅的減速曲線，APPROACH_PCT=0時傳回None
+def moto_approach(delay, stop_g):
+    if APPROACH_PCT == 0 or stop_g <= 0:
+        return None
+    
+    return approach(pio_stepper.period_us(delay), stop_g * APPROACH_PCT // 100, MOTO_START_HZ)
+
+# 立即停止PIO步進脈波，傳回實際已走步數(Python步進迴圈時傳回i)並累計滑台位置，direction 0=張力增加，1=張力減少
+def moto_stop(i, direction):
+    global MOTO_POS
+    if MOTO_PIO == 1:
+        i = MOVER.stop()
+    if MOTO_POS >= 0:
+        if direction == 0:
+            MOTO_POS = MOTO_POS + i
+        else:
+            MOTO_POS = MOTO_POS - i
+    return i
+
+# 碰到限位開關時以開關位置校正滑台位置，並記錄誤差
+def moto_pos_sync(pos):
+    global MOTO_POS, MOTO_POS_ERR
+    if MOTO_POS >= 0:
+        MOTO_POS_ERR = MOTO_POS - pos
+    MOTO_POS = pos
 
 # 張力增加
 def forward(delay, steps, check, init):
-    global MOTO_MOVE, MOTO_WAIT
+    global MOTO_MOVE, MOTO_WAIT, MOTO_PARK, MOTO_SLACK, MOTO_DIR
     LED_GREEN.off()
+    MOTO_PARK = 0
     MOTO_MOVE = 1
-    for i in range(0, steps):
+    MOTO_DIR = 0
+    # 由滑台位置起算，部分復位時無夾線判斷的行程不變
+    i0 = max(0, MOTO_POS)
+    rise = check == 1 and MOTO_POS >= 0
+    stop_g = int(LB_CONV_G / CORR_COEF)
+    predict = check == 1 and PREDICT_STOP == 1
+    slow = moto_approach(delay, stop_g) if check == 1 else None
+    # 移動中更新張力顯示(到磅由取樣中斷停止，顯示不影響停止時間)
+    show = check == 1 and MOTO_PIO == 1 and not predict
+    t_info = time.ticks_ms()
+    if check == 1:
+        STRING.begin()
+        n_string = HX711_N
+        
+    if predict:
+        n_last = HX711_N
+        g_last = TENSION_MON
+        i_last = 0
+        slope = 0 # (G/步，8位元小數)
+        lead = 0
+        
+    i = 0
+    if MOTO_PIO == 1:
+        move = moto_pio_move(steps, delay, 0, stop_g if check == 1 else 0, slow)
+        
+    while i < steps:
         if check == 1:
-            if MOTO_WAIT == 1:
+            if MOTO_WAIT == 1 or (MOTO_PIO == 1 and move.end == TENSION):
+                moto_stop(i, 0)
                 MOTO_MOVE = 0
                 MOTO_WAIT = 0
                 return(0)
             
+            # 預測停止: 由最近二筆取樣估算每步張力變化，預估已到磅即停止
+            if predict:
+                if HX711_N != n_last:
+                    if i > i_last:
+                        slope = (slope + (((TENSION_MON - g_last) << 8) // (i - i_last))) >> 1
+                        lead = (i - i_last) * PREDICT_LEAD
+                        
+                    n_last = HX711_N
+                    g_last = TENSION_MON
+                    i_last = i
+                
+                if slope > 0 and g_last + ((slope * (i - i_last + lead)) >> 8) >= stop_g:
+                    moto_stop(i, 0)
+                    MOTO_MOVE = 0
+                    MOTO_WAIT = 0
+                    return(0)
+            
+            # 線材剛性學習(張力起點後的每筆取樣)
+            if HX711_N != n_string:
+                n_string = HX711_N
+                if TENSION_MON > PARK_RISE_G:
+                    STRING.sample(i, TENSION_MON)
+            
             # 停止條件
             if botton_list('BOTTON_EXIT'):
+                moto_stop(i, 0)
                 moto_goto_standby(0)
                 MOTO_MOVE = 0
                 MOTO_WAIT = 0
                 return("Abort")
             
+            # 記錄張力起點(部分復位的停止位置)
+            if rise and TENSION_MON > PARK_RISE_G:
+                MOTO_SLACK = i0 + i
+                rise = False
+            
             # 張力傳感器異常、無夾線(行程已過ABORT_LM時張力小於5磅)
-            if i > ABORT_LM and TENSION_MON < 2267:
+            if i0 + i > ABORT_LM and TENSION_MON < 2267:
+                moto_stop(i, 0)
                 moto_goto_standby(0)
                 MOTO_MOVE = 0
                 MOTO_WAIT = 0
                 return("No String?")
         
-        # 後限位SW
-        if MOTO_SW_REAR.value():
+        # 後限位SW(PIO移動中提前停止即為碰到後限位)
+        if MOTO_SW_REAR.value() or (MOTO_PIO == 1 and move.end == LIMIT):
+            i = moto_stop(i, 0)
+            if not init:
+                moto_pos_sync(MOTO_MAX_STEPS)
+                
             moto_goto_standby(0)
             if init:
                 return i
@@ -276,59 +470,140 @@ def forward(delay, steps, check, init):
         
         # 超過最大指定張力後復位
         if ABORT_GRAM < TENSION_MON:
+            moto_stop(i, 0)
             moto_goto_standby(0)
             MOTO_MOVE = 0
             MOTO_WAIT = 0
             return("ABORT GRAM")
         
-        setStep(MOTO_FORW_W[0])
-        setStep(MOTO_FORW_W[1])
-        setStep(MOTO_FORW_W[2])
-        setStep(MOTO_FORW_W[3])
-        time.sleep(delay)
+        # 張力傳感器取樣率過低或停止取樣，立即停止(由呼叫端復位)
+        if HX711_FAULT:
+            moto_stop(i, 0)
+            MOTO_MOVE = 0
+            MOTO_WAIT = 0
+            return("Sensor Fault")
+        
+        if MOTO_PIO == 1:
+            if show and time.ticks_diff(time.ticks_ms(), t_info) > TS_INFO_MS:
+                tension_info(None)
+                t_info = time.ticks_ms()
+            else:
+                time.sleep_us(MOTO_POLL_US)
+                
+            move.poll()
+            i = move.steps
+        else:
+            MOTO_PORT.write_seq(MOTO_FORW_M)
+            if slow is None:
+                time.sleep(delay)
+            else:
+                time.sleep_us(max(int(delay * 1000000), slow.period(stop_g - TENSION_MON)))
+            i = i + 1
+            
+    moto_stop(i, 0)
 
 # 張力減少
 def backward(delay, steps, check, init):
-    global MOTO_BACK, MOTO_STEPS
+    global MOTO_BACK, MOTO_STEPS, MOTO_PARK, MOTO_DIR
     LED_GREEN.off()
+    MOTO_PARK = 0
     MOTO_BACK = 1
-    for i in range(0, steps):
+    MOTO_DIR = 1
+    i = 0
+    if MOTO_PIO == 1:
+        move = moto_pio_move(steps, delay, 1)
+        
+    while i < steps:
         if check == 1:
-            if MOTO_SW_FRONT.value():
+            # 前限位SW(PIO移動中提前停止即為碰到前限位)
+            if MOTO_SW_FRONT.value() or (MOTO_PIO == 1 and move.end == LIMIT):
+                i = moto_stop(i, 1)
+                moto_pos_sync(0)
                 if init == 1:
                     MOTO_STEPS = i
                     
-                time.sleep(0.1)
-                forward(MOTO_SPEED_V1, MOTO_RS_STEPS, 0, 0)
                 MOTO_BACK = 0
                 return 0 
             
-        setStep(MOTO_BACK_W[0])
-        setStep(MOTO_BACK_W[1])
-        setStep(MOTO_BACK_W[2])
-        setStep(MOTO_BACK_W[3])
-        time.sleep(delay)
+        if MOTO_PIO == 1:
+            time.sleep_us(MOTO_POLL_US)
+            if move.poll() and (check == 0 or move.end != LIMIT):
+                break
+                
+            i = move.steps
+        else:
+            MOTO_PORT.write_seq(MOTO_BACK_M)
+            time.sleep(delay)
+            i = i + 1
+            
+    moto_stop(i, 1)
 
-# 滑台復位
+# 滑台復位(停在前限位開關觸發點)，已知位置時高速退到前限位開關前MOTO_HOME_SLOW步再低速靠上，未知或未碰到時高速尋找
+# 傳回是否依已知位置找到前限位開關
 def moto_goto_standby(reset):
-    global HX711_I
+    global MOTO_PARK
     LED_YELLOW.on()
     time.sleep(0.1)
-    backward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 1, 0)
+    rel = None
+    if MOTO_POS > MOTO_HOME_SLOW:
+        rel = backward(MOTO_SPEED_V1, MOTO_POS - MOTO_HOME_SLOW, 1, 0)
+        
+    if rel != 0 and MOTO_POS >= 0:
+        rel = backward(MOTO_SPEED_V2, MOTO_POS + MOTO_HOME_SLOW, 1, 0)
+    
+    found = rel == 0
+    if rel != 0:
+        backward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 1, 0)
+    MOTO_PARK = 1
     if reset == 1:
-        time.sleep(1)
-        HX711_I = 0
+        tare_restart()
+    
+    beepbeep(0.1)
+    LED_PORT.write(LED_G, LED_G | LED_Y) # 黃燈滅、綠燈亮
+    return found
+
+# 拉線結束後復位，PARK_MODE=1且已知張力起點時只高速退到張力起點前PARK_MARGIN步
+# 停在張力起點前時可能仍夾著線，MOTO_PARK維持0，不追蹤零點漂移
+def moto_park():
+    park = MOTO_SLACK - PARK_MARGIN
+    if PARK_MODE == 0 or MOTO_SLACK < 0 or MOTO_POS < 0 or park <= MOTO_HOME_SLOW:
+        moto_goto_standby(0)
+        return
     
+    LED_YELLOW.on()
+    time.sleep(0.1)
+    if MOTO_POS > park:
+        backward(MOTO_SPEED_V1, MOTO_POS - park, 1, 0)
+        
     beepbeep(0.1)
-    LED_YELLOW.off()
-    LED_GREEN.on()
+    LED_PORT.write(LED_G, LED_G | LED_Y) # 黃燈滅、綠燈亮
 
-# LCD 顯示
+# LCD 顯示(不等待，寫入畫面服務，由核心1與畫面副本比對後只送出有變動的字元)
 def show_lcd(text, x, y, length):
-    text = text[:length]
-    text = f'{text :{" "}<{length}}'
-    lcd.move_to(x, y)
-    lcd.putstr(text)
+    DISPLAY.show(text, x, y, length)
+
+# LCD 數值顯示(靠右，point為小數位數，value為10**-point單位的整數)，直接寫入畫面不配置記憶體
+def show_num(value, x, y, length, point=0):
+    DISPLAY.number(value, x, y, length, point)
+
+# 效能計時開關，開啟時以計時版本取代PROF_FUNCS內的函式，關閉時換回原函式(不增加負擔)
+def prof_switch(on):
+    global PROF_ON
+    PROF_ON = on
+    PROF.on = on == 1
+    for i, name in enumerate(PROF_FUNCS):
+        func = PROF_ORIG.setdefault(name, globals()[name])
+        if on == 1:
+            globals()[name] = PROF.wrap(i, func, PROF_NARGS[i])
+        else:
+            globals()[name] = func
+
+# 重新歸零(不等待，由取樣中斷取後續取樣的中位數)
+def tare_restart():
+    HX711_LOCK.acquire()
+    TARE.restart()
+    TS_FILTERS[TS_FILTER].reset(0)
+    HX711_LOCK.release()
 
 # 按鈕偵測
 def botton_list(key):
@@ -339,28 +614,51 @@ def botton_list(key):
     else:
         return False
     
-# 張力監控
-def tension_monitoring():
-    global TENSION_MON, MOTO_WAIT, HX711_I, BOTTON_LIST, TENSION_MON_TMP
-    v0_arr = []
-    HX711_I = 0
-    while True:
-        if val := hx.get_value_noblock():
-            if HX711_I <= 10:
-                v0_arr.append(val)
-                if HX711_I == 10:
-                    v0_arr = sorted(v0_arr)
-                    v0 = v0_arr[5]
-                    v0_arr = []
-                    
-                HX711_I = HX711_I + 1
-            else:
-                TENSION_MON = int((val-(v0))/100*(HX711_CAL/20))
+# HX711取樣中斷(PIO每推入一筆取樣觸發)
+# 軟體中斷由MicroPython排程在主執行緒執行，即核心0(馬達控制迴圈的位元組碼之間)；
+# tension_monitoring()開始時另在核心1直接呼叫一次。兩者可能同時執行，故以HX711_LOCK
+# 串行化：已有一份在處理時直接返回(不可等待，以免中斷打斷持鎖的核心0程式而鎖死)，
+# 剩下的取樣由下一次中斷取出
+def hx711_irq(sm):
+    global TENSION_MON, MOTO_WAIT, TENSION_MON_TMP, HX711_BUF_I, HX711_N
+    if not HX711_LOCK.acquire(0):
+        return
+    try:
+        # 一次取出FIFO內所有取樣，避免中斷延遲時FIFO滿溢掉樣
+        n = hx.get_values_into(HX711_BUF, HX711_BUF_I)
+        HEALTH.update(time.ticks_us(), n)
+        while n:
+            val = HX711_BUF[HX711_BUF_I]
+            HX711_BUF_I = (HX711_BUF_I + 1) % HX711_BUF_LEN
+            n = n - 1
+            if hx711.is_min_saturated(val) or hx711.is_max_saturated(val):
+                HEALTH.saturated = HEALTH.saturated + 1
+            # 扣除零點(滑台停在待機位置且讀值穩定時持續追蹤零點漂移)
+            ready = TARE.ready
+            val = TARE.update(val, MOTO_PARK)
+            if val is not None:
+                if not ready:
+                    # 歸零剛完成，濾波器由此值重新開始，TENSION_MON立即反映新零點
+                    TS_FILTERS[TS_FILTER].reset(TS_CONV.convert(val))
+                TENSION_MON = TS_FILTERS[TS_FILTER].update(TS_CONV.convert(val))
+                HX711_N = (HX711_N + 1) & 0xffff
+                MOVER.tension(TENSION_MON)
                 if MOTO_MOVE == 1:
                     if LB_CONV_G < (TENSION_MON * CORR_COEF):
                         TENSION_MON_TMP = TENSION_MON
                         MOTO_WAIT = 1
-        
+    finally:
+        HX711_LOCK.release()
+
+# 張力監控(核心1)
+def tension_monitoring():
+    global BOTTON_LIST, HX711_FAULT
+    tare_restart()
+    HEALTH.restart(time.ticks_us())
+    hx.set_irq(hx711_irq)
+    hx711_irq(None) # 清空FIFO，FIFO滿時PIO會停住不再觸發中斷
+    while True:
+        pt = PROF.start()
         # 按鍵偵測
         for key in BOTTON_LIST:
             if globals()[key].value() == 1:
@@ -368,6 +666,17 @@ def tension_monitoring():
             elif BOTTON_LIST[key]:
                 if (time.ticks_ms() - BOTTON_LIST[key]) > BOTTON_CLICK_MS:
                     BOTTON_LIST[key] = 0
+        
+        # 取樣健康檢查，異常時forward()立即停止
+        if HEALTH.check(time.ticks_us()):
+            HX711_FAULT = 0
+        else:
+            HX711_FAULT = 1
+        
+        PROF.stop(PROF_MONITOR, pt)
+        # 畫面更新(I2C傳輸在核心1，不延遲核心0的馬達控制及取樣中斷)
+        DISPLAY.poll()
+        time.sleep_ms(BOTTON_SCAN_MS)
 
 def lb_kg_select():
     global TS_ARR
@@ -380,68 +689,146 @@ def lb_kg_select():
 
 # 開機初始化
 def init():
-    global LB_CONV_G, TS_ARR, ERR_MSG, ABORT_LM, MOTO_RS_STEPS, MOTO_MAX_STEPS, BOOT_COUNT, ABORT_GRAM, FT_ADD
+    global LB_CONV_G, TS_ARR, ERR_MSG, ABORT_LM, MOTO_MAX_STEPS, BOOT_COUNT, ABORT_GRAM, FT_ADD, TARE
+    t_boot = time.ticks_ms()
     max_MOTO_MAX_STEPS = MOTO_MAX_STEPS
     config_read()
+    prof_switch(PROF_ON)
+    TS_CONV.set_scale(HX711_CAL)
+    cal_table_read()
+    # 零點追蹤(滑台停在待機位置時自動修正漂移)，公克換算為HX711原始值
+    TARE = auto_zero(hx711.get_rate_sps(HX711_RATE),
+                     stable_band=int(TARE_STABLE_G * 2000 / HX711_CAL),
+                     track_band=int(TARE_TRACK_G * 2000 / HX711_CAL),
+                     settle_s=TARE_SETTLE_S,
+                     max_rate=int(TARE_DRIFT_G * 2000 / HX711_CAL))
     logs_read()
     lb_kg_select()
+    # 開機畫面顯示時同時歸零及復位
     show_lcd(" **** PicoBETH **** ", 0, 0, I2C_NUM_COLS)
     show_lcd("Version: " + VERSION, 0, 1, I2C_NUM_COLS)
     show_lcd("Date: " + VER_DATE, 0, 2, I2C_NUM_COLS)
     show_lcd("GitH: 206cc/PicoBETH", 0, 3, I2C_NUM_COLS)
-    time.sleep(3)
-    LED_RED.on()
-    LED_YELLOW.on()
-    LED_GREEN.on()
-    LED_YELLOW.off()
-    LED_GREEN.off()
-    main_interface()
+    LED_PORT.write(LED_R | LED_Y | LED_G)
+    LED_PORT.write(LED_R)
+    # 快速開機: 沿用存檔行程，開機時按住設定鍵則完整量測
+    fast = FAST_BOOT == 1 and 0 < MOTO_MAX_STEPS < max_MOTO_MAX_STEPS and not BOTTON_SETTING.value()
     ori_ABORT_GRAM = ABORT_GRAM
     ABORT_GRAM = 1000
     LB_CONV_G = min(int((DEFAULT_LB * 453.59237) * ((PRE_STRECH + 100) / 100)), int(LB_MAX * 453.59237))
-    show_lcd("Tension monitoring...", 0, 2, I2C_NUM_COLS)
     _thread.start_new_thread(tension_monitoring, ())
-    time.sleep(0.5)
-    if abs(TENSION_MON) > 10:
-        show_lcd("Reset Tension Sensor", 0, 2, I2C_NUM_COLS)
-        moto_goto_standby(1)
-        time.sleep(1)
-        if abs(TENSION_MON) > 10:
+    # 快速檢查: 依存檔位置復位，在預期位置碰到前限位開關
+    fast = moto_goto_standby(0) and abs(MOTO_POS_ERR) <= MOTO_HOME_SLOW and fast
+    # 開機時若有殘留張力，復位後在背景重新歸零，不另外等待
+    if not TARE.ready or abs(TENSION_MON) > 10:
+        tare_restart()
+    
+    if fast:
+        ABORT_LM = int(MOTO_MAX_STEPS * 0.3)
+        ABORT_GRAM = ori_ABORT_GRAM
+        # 開機畫面至少顯示BOOT_SPLASH_MS，歸零未完成時最多再等BOOT_TARE_MS
+        while time.ticks_diff(time.ticks_ms(), t_boot) < BOOT_SPLASH_MS or \
+              (not TARE.ready and time.ticks_diff(time.ticks_ms(), t_boot) < BOOT_SPLASH_MS + BOOT_TARE_MS):
+            time.sleep_ms(10)
+            
+        main_interface()
+        if not TARE.ready or abs(TENSION_MON) > 10:
             ERR_MSG = "ERROR: Tension Sensor"
             show_lcd("{: >5d}G".format(TENSION_MON), 14, 3, 6)
+        else:
+            LED_RED.off()
+            show_lcd("Ready", 0, 2, I2C_NUM_COLS)
+            
+        beepbeep(0.1)
+    else:
+        # 完整量測行程
+        main_interface()
+        show_lcd("Checking motor...", 0, 2, I2C_NUM_COLS)
+        ori_MOTO_MAX_STEPS = MOTO_MAX_STEPS
+        MOTO_MAX_STEPS = max_MOTO_MAX_STEPS
+        MOTO_MAX_STEPS = forward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 0, 1)
+        
+        if MOTO_MAX_STEPS == "ABORT GRAM":
+            ERR_MSG = "ERROR: Abort Gram"
+        elif MOTO_MAX_STEPS == "Sensor Fault":
+            ERR_MSG = "ERROR: Tension Sensor"
+            moto_goto_standby(0)
+        else:
+            ABORT_LM = int(int(MOTO_MAX_STEPS) * 0.3)
+            ABORT_GRAM = ori_ABORT_GRAM
+            FT_ADD = round(FT_ADD * MOTO_MAX_STEPS / ori_MOTO_MAX_STEPS)
+            config_save()
+            moto_goto_standby(0)
+            if not TARE.ready or abs(TENSION_MON) > 10:
+                ERR_MSG = "ERROR: Tension Sensor"
+                show_lcd("{: >5d}G".format(TENSION_MON), 14, 3, 6)
+            else:
+                LED_RED.off()
+                show_lcd("Ready", 0, 2, I2C_NUM_COLS)
+            
+        beepbeep(1)
+        
+    BOTTON_LIST['BOTTON_SETTING'] = 0
+    BOOT_COUNT = BOOT_COUNT + 1
+
+# 等待n筆新取樣(最多100毫秒)，讓張力讀值跟上停止後的滑台
+def hx711_settle(n):
+    n0 = HX711_N
+    t = time.ticks_ms()
+    while ((HX711_N - n0) & 0xffff) < n and time.ticks_diff(time.ticks_ms(), t) < 100:
+        time.sleep_ms(1)
 
-    moto_goto_standby(0)
-    show_lcd("Checking motor...", 0, 2, I2C_NUM_COLS)
-    ori_MOTO_MAX_STEPS = MOTO_MAX_STEPS
-    MOTO_MAX_STEPS = max_MOTO_MAX_STEPS
-    MOTO_MAX_STEPS = forward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 0, 1)
+# 由拉線到磅停止後的張力學習停止延遲，自我學習開啟時依線材模型調整CC張力系數及FT微調步數
+def string_learn():
+    global CORR_COEF, FT_ADD
+    stop_g = int(LB_CONV_G / CORR_COEF)
+    hx711_settle(STRING_SETTLE_N)
+    STRING.stop(stop_g, TENSION_MON)
+    if CORR_COEF_AUTO == 0 or STRING.stiffness() <= 0:
+        return
     
-    if MOTO_MAX_STEPS == "ABORT GRAM":
-        ERR_MSG = "ERROR: Abort Gram"
+    FT_ADD = min(max(STRING.steps(FT_STEP_G), FT_ADD_MIN), FT_ADD_MAX)
+    offset = STRING.offset()
+    if 0 <= offset < LB_CONV_G // 2:
+        CORR_COEF = min(max(LB_CONV_G / (LB_CONV_G - offset), CORR_MIN), CORR_MAX)
+
+# 恆拉微調FT_ADD步，direction 0=加磅，1=減磅，check=1時減磅檢查前限位
+# 方向反轉時先補上MOTO_TAKEUP步，並以反轉後的張力變化量測空行程更新MOTO_TAKEUP
+def moto_fine(direction, check):
+    global MOTO_TAKEUP
+    steps = FT_ADD
+    reverse = MOTO_DIR >= 0 and direction != MOTO_DIR
+    if reverse:
+        steps = steps + MOTO_TAKEUP
+        
+    g0 = TENSION_MON
+    if direction == 0:
+        rel = forward(MOTO_SPEED_V2, steps, check, 0)
     else:
-        MOTO_RS_STEPS = int(int(MOTO_MAX_STEPS) / 20)
-        ABORT_LM = int(int(MOTO_MAX_STEPS) * 0.3)
-        ABORT_GRAM = ori_ABORT_GRAM
-        FT_ADD = round(FT_ADD * MOTO_MAX_STEPS / ori_MOTO_MAX_STEPS)
-        config_save()
-        moto_goto_standby(0)
-        LED_RED.off()
-        show_lcd("Ready", 0, 2, I2C_NUM_COLS)
+        rel = backward(MOTO_SPEED_V2, steps, check, 0)
+    
+    k = STRING.stiffness()
+    if reverse and not rel and k > 0:
+        hx711_settle(STRING_SETTLE_N)
+        if direction == 0:
+            change = TENSION_MON - g0
+        else:
+            change = g0 - TENSION_MON
         
-    beepbeep(1)
-    BOOT_COUNT = BOOT_COUNT + 1
+        dead = min(max(steps - change / k, 0), steps)
+        MOTO_TAKEUP = min(round((MOTO_TAKEUP + dead) / 2), TAKEUP_MAX)
+        
+    return rel
 
 # 開始增加張力
 def start_tensioning():
-    global MOTO_MOVE, MOTO_WAIT, TENSION_COUNT, LOGS, CORR_COEF, FT_ADD, KNOT_FLAG, LB_CONV_G
+    global MOTO_MOVE, MOTO_WAIT, TENSION_COUNT, LOGS, KNOT_FLAG, LB_CONV_G
     if KNOT_FLAG == 0:
         LB_CONV_G = min(int((DEFAULT_LB * 453.59237) * ((PRE_STRECH + 100) / 100)), int(LB_MAX * 453.59237))
     else:
         LB_CONV_G = min(int((DEFAULT_LB * 453.59237) * ((KNOT + 100) / 100)), int(LB_MAX * 453.59237))
         
-    if SMART == 0:
-        show_lcd("Tensioning", 0, 2, I2C_NUM_COLS)
-    
+    show_lcd("Tensioning", 0, 2, I2C_NUM_COLS)
     if TIMER:
         TIMER_DEFF = time.time() - TIMER
     else:
@@ -449,27 +836,21 @@ def start_tensioning():
         
     rel = forward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 1, 0)
     if rel:
-        if SMART == 0:
-            show_lcd(str(rel), 0, 2, I2C_NUM_COLS)
-            return 0
-        else:
-            return False
+        if rel == "Sensor Fault":
+            moto_goto_standby(0)
+            
+        show_lcd(str(rel), 0, 2, I2C_NUM_COLS)
+        return 0
 
     MOTO_MOVE = 0
+    string_learn()
     abort_flag = 0
     count_add = 0
     count_sub = 0
     over_flag = 0
-    ft_add_flag = 0
-    ft_add_over = 0
-    ft_add_time = 0
-    ft_add_max = 0
-    cc_count_add = 0
-    cc_add_flag = 0
-    log_lb_max = 0
-    smart_ft_add_flag = 0
     manual_flag = 1
     log_lb_max = 0
+    log_peak = TENSION_MON
     tmp_LB_CONV_G = LB_CONV_G
     LED_YELLOW.on()
     t0 = time.time()
@@ -478,22 +859,20 @@ def start_tensioning():
         ft_flag = 0
         # 到磅偵測
         if over_flag == 0:
+            log_peak = max(log_peak, TENSION_MON)
             if abs(tmp_LB_CONV_G - TENSION_MON) < PU_PRECISE:
                 beepbeep(PU_STAY)
-                if SMART == 0:
-                    log_lb_max = tmp_LB_CONV_G
-                    tension_info(log_lb_max)
-                    show_lcd("Target Tension", 0, 2, I2C_NUM_COLS)
-                    show_lcd("S:   ", 15, 1, 5)
-                    if KNOT_FLAG == 0:
-                        tmp_LB_CONV_G = int(DEFAULT_LB * 453.59237)
-                else:
-                    time.sleep(1.34)
+                log_lb_max = tmp_LB_CONV_G
+                tension_info(log_lb_max)
+                show_lcd("Target Tension", 0, 2, I2C_NUM_COLS)
+                show_lcd("S:   ", 15, 1, 5)
+                if KNOT_FLAG == 0:
+                    tmp_LB_CONV_G = int(DEFAULT_LB * 453.59237)
                     
                 t0 = time.time()
                 if PRE_STRECH == 0:
                     over_flag = 2
-                    if CP_SW == 1 or SMART == 2:
+                    if CP_SW == 1:
                         manual_flag = 1
                     else:
                         manual_flag = 0
@@ -504,7 +883,7 @@ def start_tensioning():
                 beepbeep(0.1)
                 t0 = time.time()
                 over_flag = 2
-                if CP_SW == 1 or SMART == 2:
+                if CP_SW == 1:
                     manual_flag = 1
                 else:
                     manual_flag = 0
@@ -512,31 +891,18 @@ def start_tensioning():
         # 張力不足加磅
         if tmp_LB_CONV_G > TENSION_MON and (manual_flag == 1 or over_flag == 0):
             diff_g = tmp_LB_CONV_G - TENSION_MON
-            abort_flag = forward(MOTO_SPEED_V2, FT_ADD, 0 ,0)
+            abort_flag = moto_fine(0, 0)
             if diff_g < PU_PRECISE:
                 ft_flag = 0
-                cc_add_flag = 1
-                if SMART == 2 and over_flag == 2:
-                    if time.ticks_ms() - ft_add_time < 1000:
-                        ft_add_flag = ft_add_flag + 1
-                    else:
-                        ft_add_max = max(ft_add_max, ft_add_flag)
-                        ft_add_flag = 0
-                
-                    ft_add_time = time.ticks_ms()
             else:
                 ft_flag = 1
-                smart_ft_add_flag = 1
-                if cc_add_flag == 0:
-                    cc_count_add = cc_count_add + 1
-                
                 if over_flag == 0:
                     count_add = count_add + 1
         
         # 張力超過減磅
         if (tmp_LB_CONV_G + PU_PRECISE) < TENSION_MON and (manual_flag == 1 or over_flag == 0):
             diff_g =  TENSION_MON - tmp_LB_CONV_G
-            abort_flag = backward(MOTO_SPEED_V2, FT_ADD * FT_SUB_COEF, 0, 0)
+            abort_flag = moto_fine(1, 0)
             if diff_g < PU_PRECISE:
                 ft_flag = 0
             else:
@@ -545,85 +911,62 @@ def start_tensioning():
             if over_flag == 0:
                 count_sub = count_sub + 1
             
-            if SMART == 2 and over_flag == 2:
-                ft_add_over  = 1
+        # 張力傳感器取樣異常
+        if abort_flag == "Sensor Fault":
+            moto_goto_standby(0)
+            MOTO_WAIT = 0
+            show_lcd(MA_ARR[CP_SW], 11, 3, 1)
+            show_lcd(abort_flag, 0, 2, I2C_NUM_COLS)
+            show_lcd("     ", 15, 1, 5)
+            return 0
+        
+        # 手動加磅
+        if botton_list('BOTTON_UP'):
+            manual_flag = 0
+            moto_fine(0, 0)
+            show_lcd(MA_ARR[manual_flag], 11, 3, 1)
+            count_add = count_add + 1
             
-        if SMART == 0:
-            # 手動加磅
-            if botton_list('BOTTON_UP'):
-                manual_flag = 0
-                forward(MOTO_SPEED_V2, FT_ADD, 0, 0)
-                show_lcd(MA_ARR[manual_flag], 11, 3, 1)
-                count_add = count_add + 1
-                
-            # 手動減磅
-            if botton_list('BOTTON_DOWN'):
+        # 手動減磅
+        if botton_list('BOTTON_DOWN'):
+            manual_flag = 0
+            moto_fine(1, 1)
+            show_lcd(MA_ARR[manual_flag], 11, 3, 1)
+            count_sub = count_sub + 1
+            
+        # 手動改自動微調
+        if botton_list('BOTTON_SETTING'):
+            if manual_flag == 0:
+                manual_flag = 1
+            else:
                 manual_flag = 0
-                backward(MOTO_SPEED_V2, FT_ADD * FT_SUB_COEF, 1, 0)
-                show_lcd(MA_ARR[manual_flag], 11, 3, 1)
-                count_sub = count_sub + 1
                 
-            # 手動改自動微調
-            if botton_list('BOTTON_SETTING'):
-                if manual_flag == 0:
-                    manual_flag = 1
-                else:
-                    manual_flag = 0
-                    
-                show_lcd(MA_ARR[manual_flag], 11, 3, 1)
-                beepbeep(0.1)
-        
-            # 斷線(已達指定張力突然小於5磅)
-            if TENSION_MON < 2267:
-                show_lcd(MA_ARR[CP_SW], 11, 3, 1)
-                show_lcd("Resetting...", 0, 2, I2C_NUM_COLS)
-                moto_goto_standby(0)
-                show_lcd("String Broken?", 0, 2, I2C_NUM_COLS)
-                show_lcd("     ", 15, 1, 5)
-                MOTO_WAIT = 0
-                return 0
+            show_lcd(MA_ARR[manual_flag], 11, 3, 1)
+            beepbeep(0.1)
+    
+        # 斷線(已達指定張力突然小於5磅)
+        if TENSION_MON < 2267:
+            show_lcd(MA_ARR[CP_SW], 11, 3, 1)
+            show_lcd("Resetting...", 0, 2, I2C_NUM_COLS)
+            moto_goto_standby(0)
+            show_lcd("String Broken?", 0, 2, I2C_NUM_COLS)
+            show_lcd("     ", 15, 1, 5)
+            MOTO_WAIT = 0
+            return 0
         
         # 夾線頭按鈕取消按鈕
-        if botton_list('BOTTON_HEAD') or \
-           botton_list('BOTTON_EXIT') or \
-           (SMART == 2 and ft_add_flag > 10) or \
-           (SMART == 2 and time.time()-t0 > 10 and over_flag == 2) or \
-           (SMART == 2 and smart_ft_add_flag == 0):
-            #CC參數自動調整
-            cc_add_sub = 0
-            if CORR_COEF_AUTO == 1 and SMART != 2:
-                if cc_count_add > 5:
-                    CORR_COEF = CORR_COEF - 0.01
-                elif cc_count_add == 0:
-                    CORR_COEF = CORR_COEF + 0.01
-            
-            #FT參數自動調整
-            if SMART == 2:
-                ft_add_max = max(ft_add_max, ft_add_flag)
-                if smart_ft_add_flag == 0:
-                    CORR_COEF = CORR_COEF + 0.01
-                elif ft_add_over == 1:
-                    FT_ADD = FT_ADD - 1
-                elif ft_add_max >= 8:
-                    FT_ADD = FT_ADD + 2
-                elif ft_add_max >= 5:
-                    FT_ADD = FT_ADD + 1
-                
-                moto_goto_standby(0)
-                MOTO_WAIT = 0
-                TENSION_COUNT = TENSION_COUNT + 1
-                return True
-            
+        if botton_list('BOTTON_HEAD') or botton_list('BOTTON_EXIT'):
             log_s = time.time() - t0
+            log_over = max(0, log_peak - LB_CONV_G)
             show_lcd(MA_ARR[CP_SW], 11, 3, 1)
             show_lcd("Resetting...", 0, 2, I2C_NUM_COLS)
-            moto_goto_standby(0)
+            moto_park()
             show_lcd("Ready", 0, 2, I2C_NUM_COLS)
             show_lcd("     ", 15, 1, 5)
             MOTO_WAIT = 0
             TENSION_COUNT = TENSION_COUNT + 1
             #LOG寫入
-            LOGS.insert(0, [TENSION_COUNT, TIMER_DEFF, LB_KG_SELECT, DEFAULT_LB, log_lb_max, PRE_STRECH, log_s, count_add, count_sub, CORR_COEF, HX711_CAL, FT_ADD, KNOT_FLAG, KNOT])
+            LOGS.insert(0, [TENSION_COUNT, TIMER_DEFF, LB_KG_SELECT, DEFAULT_LB, log_lb_max, PRE_STRECH, log_s, count_add, count_sub, CORR_COEF, HX711_CAL, FT_ADD, KNOT_FLAG, KNOT, log_over])
             logs_save([LOGS[0]], "a")
             if len(LOGS) > LOG_MAX:
                 LOGS = LOGS[:LOG_MAX]
@@ -640,11 +983,10 @@ def start_tensioning():
             return 0  
         
         if ft_flag == 0:
-            if SMART == 0:
-                tension_info(None)
-                show_lcd("{: >3d}".format(time.time()-t0), 17, 1, 3)
-            else:
-                time.sleep(0.617)
+            tension_info(None)
+            show_num(time.time() - t0, 17, 1, 3)
+            # 畫面未變動時不送出，改以下一筆取樣控制迴圈速度
+            hx711_settle(1)
         else:
             time.sleep(0.05)
 
@@ -655,8 +997,8 @@ def setting_ts():
     set_count = len(TS_ARR)
     i = CURSOR_XY_TS_TMP
     cursor_xy = TS_ARR[i][0], TS_ARR[i][1]
-    lcd.move_to(TS_ARR[i][0], TS_ARR[i][1])
-    lcd.blink_cursor_on()
+    DISPLAY.cursor(TS_ARR[i][0], TS_ARR[i][1])
+    DISPLAY.cursor_mode(CURSOR_BLINK)
     ps_kt_tmp = 0
     if KNOT_FLAG == 0:
         ps_kt_tmp = PRE_STRECH
@@ -768,7 +1110,7 @@ def setting_ts():
             
             show_lcd("{:.1f}".format(DEFAULT_LB), 4, 0, 4)
             show_lcd("{: >4.1f}".format(DEFAULT_LB * 0.45359237), 4, 1, 4)
-            lcd.move_to(TS_ARR[i][0],TS_ARR[i][1])
+            DISPLAY.cursor(TS_ARR[i][0],TS_ARR[i][1])
             last_set_time = time.ticks_ms()
             beepbeep(0.1)
             time.sleep(BOTTON_SLEEP)
@@ -787,7 +1129,7 @@ def setting_ts():
                     i = set_count - 1
             
             CURSOR_XY_TS_TMP = i
-            lcd.move_to(TS_ARR[i][0], TS_ARR[i][1])
+            DISPLAY.cursor(TS_ARR[i][0], TS_ARR[i][1])
             cursor_xy = TS_ARR[i][0], TS_ARR[i][1]
             last_set_time = time.ticks_ms()
             beepbeep(0.1)
@@ -796,19 +1138,19 @@ def setting_ts():
         # 按下離開鍵動作
         if botton_list('BOTTON_EXIT') or ((time.ticks_ms() - last_set_time) > (AUTO_SAVE_SEC * 1000)):
             config_save()
-            lcd.blink_cursor_off()
+            DISPLAY.cursor_mode(CURSOR_ON)
             beepbeep(0.1)
             time.sleep(BOTTON_SLEEP)
             return 0
 
 # 設定頁面
 def setting():
-    global CURSOR_XY_TMP, CORR_COEF, HX711_CAL, LB_KG_SELECT, FT_ADD, CURSOR_XY_TS_TMP, CP_SW, CORR_COEF_AUTO, SMART, LB_CONV_G, PRE_STRECH, TENSION_COUNT
+    global CURSOR_XY_TMP, CORR_COEF, HX711_CAL, LB_KG_SELECT, FT_ADD, CURSOR_XY_TS_TMP, CP_SW, CORR_COEF_AUTO, LB_CONV_G, PRE_STRECH, TENSION_COUNT, TS_FILTER
     set_count = len(MENU_ARR)
     i = CURSOR_XY_TMP
     cursor_xy = MENU_ARR[i][0], MENU_ARR[i][1]
-    lcd.move_to(MENU_ARR[i][0], MENU_ARR[i][1])
-    lcd.blink_cursor_on()
+    DISPLAY.cursor(MENU_ARR[i][0], MENU_ARR[i][1])
+    DISPLAY.cursor_mode(CURSOR_BLINK)
     time.sleep(BOTTON_SLEEP)
     while True:
         # 按下上下鍵動作
@@ -905,90 +1247,15 @@ def setting():
                 elif BOTTON_DOWN.value():
                     HX711_CAL = HX711_CAL - 0.01
             
-            # 自我FT&CC學習
-            elif cursor_xy == (11, 2):
-                if BOTTON_SETTING.value():
-                    lcd.hide_cursor()
-                    SMART = 1
-                    beepbeep(0.1)
-                    show_lcd("sFT: ", 0, 0, 10)
-                    show_lcd("sCC: ", 0, 1, 10)
-                    show_lcd("TEST:   T", 0, 2, 10)
-                    ori_FT_ADD = FT_ADD
-                    ori_CORR_COEF = CORR_COEF
-                    LB_CONV_G = int(15 * 453.59237)
-                    FT_ADD = 2
-                    r_FT_ADD = FT_ADD
-                    r_CORR_COEF = CORR_COEF
-                    j = 0
-                    t_pass = 0
-                    fail_flag = 0
-                    cc_array = []
-                    while True:
-                        if BOTTON_EXIT.value():
-                            beepbeep(0.1)
-                            break
-                        
-                        show_lcd("{:02d}".format(j+1), 6, 2, 2)
-                        if SMART == 1:
-                            time.sleep(0.5)
-                            ret_cc = forward(MOTO_SPEED_V1, MOTO_MAX_STEPS, 1, 0)
-                            TENSION_COUNT = TENSION_COUNT + 1
-                            if ret_cc == 0:
-                                CORR_COEF = round(((TENSION_MON)/LB_CONV_G), 2)
-                                cc_array.append(CORR_COEF)
-                                beepbeep(PU_STAY)
-                                moto_goto_standby(0)
-                            else:
-                                fail_flag = 1
-                            
-                            if j == 4:
-                                cc_array.sort()
-                                CORR_COEF = cc_array[2]
-                                show_lcd("o", 9, 1, 1)
-                                SMART = 2
-                                
-                            j = j + 1
-                        elif SMART == 2:
-                            time.sleep(0.5)
-                            r_CORR_COEF = CORR_COEF
-                            ret_ft = start_tensioning()
-                            if ret_ft == True:
-                                if (r_FT_ADD == FT_ADD) and (r_CORR_COEF == CORR_COEF):
-                                    t_pass = t_pass + 1
-                                    if t_pass == 1:
-                                        show_lcd("o", 7, 0, 1)
-                                    elif t_pass == 2:
-                                        show_lcd("v", 7, 0, 1)
-                                        show_lcd("v", 9, 1, 1)
-                                        config_save()
-                                        SMART = 0 
-                                else:
-                                    r_FT_ADD = FT_ADD
-                            else:
-                                fail_flag = 1
-                                
-                            j = j + 1
-                        
-                        if fail_flag:
-                            show_lcd("X", 5, 0, 4)
-                            show_lcd("X", 5, 1, 4)
-                            show_lcd("FAIL", 6, 2, 5)
-                            SMART = 0
-                            CORR_COEF = ori_CORR_COEF
-                            FT_ADD = ori_FT_ADD
-                            moto_goto_standby(0)
-                            while True:
-                                if BOTTON_EXIT.value():
-                                    break
-                        else:
-                            show_lcd("{:02d}".format(FT_ADD), 5, 0, 2)
-                            show_lcd("{: >1.2f}".format(CORR_COEF), 5, 1, 4)
-                            show_lcd("{: >5d}".format(TENSION_COUNT) +"T", 14, 3, 6)
+            # 張力濾波器選擇
+            elif cursor_xy == (19, 2):
+                if BOTTON_UP.value():
+                    TS_FILTER = (TS_FILTER + 1) % len(FILTER_ARR)
+                elif BOTTON_DOWN.value():
+                    TS_FILTER = (TS_FILTER - 1) % len(FILTER_ARR)
                     
-                    lcd.show_cursor()
-                    lcd.blink_cursor_on()
-                    setting_interface()
+                TS_FILTERS[TS_FILTER].reset(TENSION_MON)
+                show_lcd(FILTER_ARR[TS_FILTER], 19, 2, 1)
 
             # LOG顯示
             elif cursor_xy == (19, 3):
@@ -996,7 +1263,7 @@ def setting():
                     beepbeep(0.1)
                     if len(LOGS) != 0:
                         logs_idx = 0
-                        lcd.hide_cursor()
+                        DISPLAY.cursor_mode(CURSOR_OFF)
                         logs_interface("init")
                         logs_interface(logs_idx)
                         log_flag = 0
@@ -1018,8 +1285,67 @@ def setting():
                                 log_flag = logs_idx
                             
                         setting_interface()
-                        lcd.show_cursor()
-                        lcd.blink_cursor_on()
+                        DISPLAY.cursor_mode(CURSOR_BLINK)
+                
+                # 效能計時畫面(隱藏)
+                elif BOTTON_UP.value():
+                    beepbeep(0.1)
+                    prof_idx = 0
+                    DISPLAY.cursor_mode(CURSOR_OFF)
+                    prof_interface("init")
+                    prof_interface(prof_idx)
+                    prof_time = time.ticks_ms()
+                    while True:
+                        prof_key = 1
+                        if BOTTON_RIGHT.value():
+                            prof_idx = (prof_idx + 1) % len(PROF.names)
+                        elif BOTTON_LEFT.value():
+                            prof_idx = (prof_idx - 1) % len(PROF.names)
+                        elif BOTTON_UP.value():
+                            prof_switch(1 - PROF_ON)
+                        elif BOTTON_DOWN.value():
+                            PROF.reset()
+                        elif BOTTON_SETTING.value():
+                            PROF.dump()
+                        elif BOTTON_EXIT.value():
+                            beepbeep(0.1)
+                            break
+                        else:
+                            prof_key = 0
+                        
+                        if prof_key:
+                            beepbeep(0.1)
+                        
+                        # 按鍵或每隔TS_INFO_MS*5更新數值
+                        if prof_key or (time.ticks_ms() - prof_time) > TS_INFO_MS * 5:
+                            prof_interface(prof_idx)
+                            prof_time = time.ticks_ms()
+                        
+                    setting_interface()
+                    DISPLAY.cursor_mode(CURSOR_BLINK)
+                
+                # 張力傳感器診斷畫面(隱藏)
+                elif BOTTON_DOWN.value():
+                    beepbeep(0.1)
+                    DISPLAY.cursor_mode(CURSOR_OFF)
+                    hx_interface("init")
+                    hx_interface(None)
+                    hx_time = time.ticks_ms()
+                    while True:
+                        if BOTTON_DOWN.value():
+                            beepbeep(0.1)
+                            hx.overruns = 0
+                            HEALTH.saturated = 0
+                        elif BOTTON_EXIT.value():
+                            beepbeep(0.1)
+                            break
+                        
+                        if (time.ticks_ms() - hx_time) > TS_INFO_MS * 5:
+                            hx_interface(None)
+                            hx_time = time.ticks_ms()
+                        
+                    setting_interface()
+                    DISPLAY.cursor_mode(CURSOR_BLINK)
 
             if CORR_COEF >= CORR_MAX:
                 CORR_COEF = CORR_MAX  
@@ -1030,6 +1356,8 @@ def setting():
                 HX711_CAL = HX711_MAX  
             elif HX711_CAL <= HX711_MIN:
                 HX711_CAL = HX711_MIN
+            
+            TS_CONV.set_scale(HX711_CAL)
                 
             if FT_ADD >= FT_ADD_MAX:
                 FT_ADD = FT_ADD_MAX  
@@ -1039,7 +1367,7 @@ def setting():
             show_lcd("{: >1.2f}".format(CORR_COEF), 16, 1, 4)
             show_lcd("{: >2.2f}".format(HX711_CAL), 4, 2, 5)
             show_lcd("{:02d}".format(FT_ADD), 15, 0, 2)
-            lcd.move_to(MENU_ARR[i][0],MENU_ARR[i][1])
+            DISPLAY.cursor(MENU_ARR[i][0],MENU_ARR[i][1])
             beepbeep(0.1)
             time.sleep(BOTTON_SLEEP)
 
@@ -1057,7 +1385,7 @@ def setting():
                     i = set_count - 1
             
             CURSOR_XY_TMP = i
-            lcd.move_to(MENU_ARR[i][0], MENU_ARR[i][1])
+            DISPLAY.cursor(MENU_ARR[i][0], MENU_ARR[i][1])
             cursor_xy = MENU_ARR[i][0], MENU_ARR[i][1]
             beepbeep(0.1)
             time.sleep(BOTTON_SLEEP)
@@ -1065,7 +1393,7 @@ def setting():
         # 按下離開鍵動作
         if botton_list('BOTTON_EXIT'):
             config_save()
-            lcd.blink_cursor_off()
+            DISPLAY.cursor_mode(CURSOR_ON)
             beepbeep(0.1)
             time.sleep(BOTTON_SLEEP)
             return 0
@@ -1075,7 +1403,7 @@ def setting_interface():
     show_lcd("UN:        FT: "+ "{:02d}".format(FT_ADD), 0, 0, I2C_NUM_COLS)
     show_lcd(UNIT_ARR[LB_KG_SELECT], 4, 0, 5) 
     show_lcd("AT: "+ ONOFF_ARR[CP_SW] +"    CC: "+ ML_ARR[CORR_COEF_AUTO] + "{: >1.2f}".format(CORR_COEF), 0, 1, I2C_NUM_COLS)
-    show_lcd("HX: "+ "{: >2.2f}".format(HX711_CAL) +"  *SMART", 0, 2, I2C_NUM_COLS)
+    show_lcd("HX: "+ "{: >2.2f}".format(HX711_CAL) +"  K:"+ "{: >4.2f}".format(min(STRING.stiffness(), 9.99)) +" F"+ FILTER_ARR[TS_FILTER], 0, 2, I2C_NUM_COLS)
     show_lcd("<PicoBETH>"+ "{: >3d}".format(BOOT_COUNT) +"B"+ "{: >5d}".format(TENSION_COUNT) +"T", 0, 3, I2C_NUM_COLS)
     
 # LOG介面顯示
@@ -1108,10 +1436,56 @@ def logs_interface(idx):
         show_lcd("{: >2d}".format(int(LOGS[idx][7])), 3, 2, 2)
         show_lcd("{: >2d}".format(int(LOGS[idx][8])), 6, 2, 2)
         show_lcd("{:02d}".format(int(LOGS[idx][11])), 9, 2, 2)
+        if len(LOGS[idx]) > 14:
+            show_lcd("{: >3d}".format(min(int(LOGS[idx][14]), 999)), 12, 2, 3)
+        else:
+            show_lcd("   ", 12, 2, 3)
         show_lcd("{:.2f}".format(float(LOGS[idx][9])), 4, 3, 4)
         show_lcd("{:.2f}".format(float(LOGS[idx][10])), 9, 3, 5)
         show_lcd("{: >5d}".format(int(LOGS[idx][0])), 14, 3, 5)
 
+# 效能計時介面顯示(單位us)
+def prof_interface(idx):
+    if idx=="init":
+        show_lcd("  /                 ", 0, 0, I2C_NUM_COLS)
+        show_lcd("N:        AV:       ", 0, 1, I2C_NUM_COLS)
+        show_lcd("MN:       MX:       ", 0, 2, I2C_NUM_COLS)
+        show_lcd("U:On/Off D:Rst S:Out", 0, 3, I2C_NUM_COLS)
+    else:
+        n, t_min, t_avg, t_max = PROF.stats(idx)
+        show_lcd("{:0>2d}".format(idx + 1), 0, 0, 2)
+        show_lcd("{:0>2d}".format(len(PROF.names)), 3, 0, 2)
+        show_lcd(PROF.names[idx], 6, 0, 10)
+        show_lcd(ONOFF_ARR[PROF_ON], 17, 0, 3)
+        show_lcd("{: >7d}".format(min(n, 9999999)), 2, 1, 7)
+        show_lcd(prof_us(t_avg), 13, 1, 6)
+        show_lcd(prof_us(t_min), 3, 2, 6)
+        show_lcd(prof_us(t_max), 13, 2, 6)
+
+# 張力傳感器診斷介面顯示
+def hx_interface(idx):
+    if idx=="init":
+        show_lcd("HX711 SPS:   /      ", 0, 0, I2C_NUM_COLS)
+        show_lcd("JIT:    /    us     ", 0, 1, I2C_NUM_COLS)
+        show_lcd("OVR:      SAT:      ", 0, 2, I2C_NUM_COLS)
+        show_lcd("RAW:                ", 0, 3, I2C_NUM_COLS)
+    else:
+        show_lcd("{: >3d}".format(0 if HEALTH.stalled else max(HEALTH.rate, 0)), 10, 0, 3)
+        show_lcd("{:d}".format(HEALTH.sps), 14, 0, 2)
+        show_lcd("ERR" if HX711_FAULT else "OK", 17, 0, 3)
+        show_lcd("{: >4d}".format(min(HEALTH.jitter, 9999)), 4, 1, 4)
+        show_lcd("{: >4d}".format(min(HEALTH.jitter_max, 9999)), 9, 1, 4)
+        show_lcd("{: >5d}".format(min(hx.overruns, 99999)), 4, 2, 5)
+        show_lcd("{: >6d}".format(min(HEALTH.saturated, 999999)), 14, 2, 6)
+        show_lcd("{: >8d}".format(HX711_BUF[HX711_BUF_I - 1]), 4, 3, 8)
+
+# 效能計時數值，6個字元，超過999999us改以ms顯示
+def prof_us(us):
+    if us < 1000000:
+        return "{: >6d}".format(us)
+    else:
+        return "{: >5d}m".format(min(us // 1000, 99999))
+
 # 設定主畫面顯示
 def main_interface():
     show_lcd("LB:     /--.- "+ PSKT_ARR[KNOT_FLAG] +":  %", 0, 0, I2C_NUM_COLS)
@@ -1132,58 +1506,75 @@ def show_timer():
         show_lcd("{: >3d}".format(int(TIMER_DEFF / 60)), 14, 1, 3)
         show_lcd("{: >2d}".format(TIMER_DEFF % 60), 18, 1, 2)
 
-init()
-ts_info_time = time.ticks_ms()
-timer_flag = 0
-while True:
-    # 開始張緊
-    if botton_list('BOTTON_HEAD'):
-        start_tensioning()
-        show_timer()
+if __name__ == "__main__":
+    init()
+    ts_info_time = time.ticks_ms()
+    timer_flag = 0
+    while True:
+        # 開始張緊
+        if botton_list('BOTTON_HEAD'):
+            start_tensioning()
+            show_timer()
     
-    # 設定模式
-    if botton_list('BOTTON_SETTING'):
-        beepbeep(0.1)
-        setting_interface()
-        setting()
-        main_interface()
-        show_lcd("Ready", 0, 2, I2C_NUM_COLS)
-        show_timer()
+        # 設定模式
+        if botton_list('BOTTON_SETTING'):
+            beepbeep(0.1)
+            setting_interface()
+            setting()
+            main_interface()
+            show_lcd("Ready", 0, 2, I2C_NUM_COLS)
+            show_timer()
     
-    # 計時器開關
-    if botton_list('BOTTON_EXIT'):
-        if TIMER:
-            if timer_flag:
-                TIMER = 0
-                timer_flag = 0
-                show_lcd("      ", 14, 1, 6)
+        # 長按取消鍵完整復位(滑台停在張力起點前時)
+        if PARK_MODE == 1 and MOTO_POS > 0 and BOTTON_EXIT.value():
+            t_hold = time.ticks_ms()
+            while BOTTON_EXIT.value() and time.ticks_diff(time.ticks_ms(), t_hold) < PARK_HOME_MS:
+                time.sleep_ms(10)
+            
+            if BOTTON_EXIT.value():
+                BOTTON_LIST['BOTTON_EXIT'] = 0
+                show_lcd("Resetting...", 0, 2, I2C_NUM_COLS)
+                moto_goto_standby(0)
+                show_lcd("Ready", 0, 2, I2C_NUM_COLS)
+                while BOTTON_EXIT.value():
+                    time.sleep_ms(10)
+                
+                BOTTON_LIST['BOTTON_EXIT'] = 0
+            
+        # 計時器開關
+        if botton_list('BOTTON_EXIT'):
+            if TIMER:
+                if timer_flag:
+                    TIMER = 0
+                    timer_flag = 0
+                    show_lcd("      ", 14, 1, 6)
+                else:
+                    timer_flag = time.time()
             else:
-                timer_flag = time.time()
-        else:
-            TIMER = time.time()
-            show_lcd("   m  ", 14, 1, 6)
+                TIMER = time.time()
+                show_lcd("   m  ", 14, 1, 6)
             
-        beepbeep(0.5)
+            beepbeep(0.5)
     
-    # 加減磅設定
-    if botton_list('BOTTON_UP') or botton_list('BOTTON_DOWN') or botton_list('BOTTON_LEFT') or botton_list('BOTTON_RIGHT'):
-        setting_ts()
+        # 加減磅設定
+        if botton_list('BOTTON_UP') or botton_list('BOTTON_DOWN') or botton_list('BOTTON_LEFT') or botton_list('BOTTON_RIGHT'):
+            setting_ts()
     
-    # 張力顯示更新
-    if (time.ticks_ms() - ts_info_time) > TS_INFO_MS:
-        tension_info(None)
-        if TIMER:
-            if timer_flag == 0:
-                TIMER_DEFF = time.time() - TIMER
-                show_lcd("{: >3d}".format(int(TIMER_DEFF / 60)), 14, 1, 3)
-                show_lcd("{: >2d}".format(TIMER_DEFF % 60), 18, 1, 2)
+        # 張力顯示更新
+        if (time.ticks_ms() - ts_info_time) > TS_INFO_MS:
+            tension_info(None)
+            if TIMER:
+                if timer_flag == 0:
+                    TIMER_DEFF = time.time() - TIMER
+                    show_num(TIMER_DEFF // 60, 14, 1, 3)
+                    show_num(TIMER_DEFF % 60, 18, 1, 2)
         
-        lcd.move_to(TS_ARR[CURSOR_XY_TS_TMP][0], TS_ARR[CURSOR_XY_TS_TMP][1])
-        lcd.show_cursor()
-        ts_info_time = time.ticks_ms()
+            DISPLAY.cursor(TS_ARR[CURSOR_XY_TS_TMP][0], TS_ARR[CURSOR_XY_TS_TMP][1])
+            DISPLAY.cursor_mode(CURSOR_ON)
+            ts_info_time = time.ticks_ms()
         
-    if ERR_MSG:
-        beepbeep(3)
-        show_lcd(ERR_MSG, 0, 2, I2C_NUM_COLS)
-        break
+        if ERR_MSG:
+            beepbeep(3)
+            show_lcd(ERR_MSG, 0, 2, I2C_NUM_COLS)
+            break
     
\ No newline at end of file
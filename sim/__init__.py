@@ -0,0 +1,143 @@
+# Host-side simulator for PicoBETH.
+#
+# install() registers fake machine, rp2, micropython and utime modules so
+# src/ can be imported under CPython. boot() goes further: it builds a
+# simulated head (sim.rig), a 20x4 LCD (sim.lcd) and a virtual clock
+# (sim.clock), then imports main.py against them, so init() and
+# start_tensioning() run end-to-end on a Linux box, faster than real time.
+#
+#     import sim
+#     from sim.rig import String
+#     s = sim.boot(string=String(stiffness=1.2))
+#     s.init()
+#     print(s.pull(hold_s=5))
+#     print(s.lcd)
+
+import os, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def install():
+    # Register the fake modules. Safe to call more than once.
+    from sim import machine, micropython, rp2, utime
+    sys.modules.setdefault('machine', machine)
+    sys.modules.setdefault('micropython', micropython)
+    sys.modules.setdefault('rp2', rp2)
+    sys.modules.setdefault('utime', utime)
+
+class Sim:
+
+    def __init__(self, main, rig, lcd, workdir):
+        self.main = main
+        self.rig = rig
+        self.lcd = lcd
+        self.workdir = workdir
+
+    @property
+    def now(self):
+        # Virtual time in seconds
+        from sim.clock import clock
+        return clock.now / 1000000
+
+    def init(self):
+        self.main.init()
+        return self.main.ERR_MSG
+
+    def press(self, name, after_s=0, hold_ms=100):
+        # Presses one of the BOTTON_* inputs of main.py after_s from now
+        from sim.clock import clock
+        pin = getattr(self.main, name).id
+        self.rig.press(pin, clock.now + int(after_s * 1000000), hold_ms)
+
+    def pull(self, hold_s=5, button='BOTTON_HEAD', trace=None):
+        # One pull: start_tensioning(), ended by pressing button hold_s
+        # after the target tension is first reached. trace, when a list,
+        # gets (seconds, TENSION_MON) every millisecond of the pull.
+        from sim.clock import clock
+        rig = self.rig
+        main = self.main
+        rig.peak_g = 0.0
+        state = {'reached': None}
+
+        def watch():
+            if trace is not None:
+                trace.append(((clock.now - t0) / 1000000, main.TENSION_MON))
+            if state['reached'] is None and abs(main.LB_CONV_G - main.TENSION_MON) < main.PU_PRECISE:
+                state['reached'] = clock.now
+                self.press(button, hold_s)
+            if not state.get('done'):
+                clock.at(clock.now + 1000, watch)
+
+        t0 = clock.now
+        steps0 = rig.steps
+        clock.at(clock.now, watch)
+        try:
+            ret = main.start_tensioning()
+        finally:
+            state['done'] = True
+        return {
+            'result': ret,
+            'seconds': (clock.now - t0) / 1000000,
+            'to_target_s': None if state['reached'] is None else (state['reached'] - t0) / 1000000,
+            'peak_g': round(rig.peak_g),
+            'steps': rig.steps - steps0,
+            'screen': self.lcd.screen(),
+        }
+
+def boot(workdir=None, files=None, **rig_options):
+    """Builds a fresh simulated head and imports main.py against it
+
+    Args:
+        workdir: directory for config.cfg and logs.txt, a new temporary
+            one by default
+        files: {name: text} written into workdir first, e.g. config.cfg
+        rig_options: passed to sim.rig.Rig
+
+    Returns:
+        Sim
+    """
+    install()
+    from sim import gc, thread, utime
+    from sim.clock import clock
+    from sim.lcd import Pcf8574Lcd
+    from sim.machine import I2C, Pin, mem32
+    from sim.rig import Rig
+    from sim.rp2 import StateMachine
+
+    clock.reset()
+    Pin.reset_all()
+    I2C.reset_all()
+    StateMachine.reset_all()
+    mem32.regs.clear()
+
+    lcd = Pcf8574Lcd()
+    I2C.attach(0x27, lcd)
+    rig = Rig(**rig_options)
+
+    workdir = workdir or tempfile.mkdtemp(prefix='picobeth-')
+    for name, text in (files or {}).items():
+        with open(os.path.join(workdir, name), 'w') as f:
+            f.write(text)
+    os.chdir(workdir)
+
+    for path in (os.path.join(ROOT, 'src'), ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for name in list(sys.modules):
+        if name in ('main', 'src', 'lcd_api', 'pico_i2c_lcd') or name.startswith('src.'):
+            del sys.modules[name]
+
+    # main.py and src/ see the fakes as time, _thread and gc
+    fakes = {'time': utime, '_thread': thread, 'gc': gc}
+    saved = {name: sys.modules.get(name) for name in fakes}
+    sys.modules.update(fakes)
+    try:
+        import main
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                del sys.modules[name]
+            else:
+                sys.modules[name] = module
+
+    return Sim(main, rig, lcd, workdir)
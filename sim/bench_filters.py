@@ -0,0 +1,69 @@
+# Per-sample cost and response of the tension filters in src/filters.py.
+#
+# Feeds every filter the same synthetic pull: a ramp to the target, then a
+# hold with load cell noise. For each filter it reports the cost per
+# update, the lag (samples to reach 90% of a step), the noise left during
+# the hold and how many hold samples fall outside +-PU_PRECISE, which is
+# what triggers a constant-pull correction in start_tensioning().
+#
+# Usage: python -m sim.bench_filters [noise_g]
+
+import random, sys, time
+
+from src.filters import passthrough, moving_average, moving_median, ema, kalman
+
+TARGET = 8165       # 18 lb in grams
+PU_PRECISE = 50
+RAMP = 160          # samples, 2 s at 80 SPS
+HOLD = 800          # samples, 10 s at 80 SPS
+
+FILTERS = [
+    ('-', passthrough()),
+    ('A', moving_average(4)),
+    ('M', moving_median(5)),
+    ('E', ema(2)),
+    ('K', kalman(4, 64)),
+]
+
+def signal(noise):
+    rnd = random.Random(1)
+    out = []
+    for i in range(RAMP):
+        out.append(int(TARGET * i / RAMP + rnd.gauss(0, noise)))
+    for i in range(HOLD):
+        out.append(int(TARGET + rnd.gauss(0, noise)))
+    return out
+
+def lag(f):
+    f.reset(0)
+    for i in range(100):
+        if f.update(TARGET) >= TARGET * 0.9:
+            return i + 1
+    return None
+
+def run(noise):
+    samples = signal(noise)
+    rows = []
+    for name, f in FILTERS:
+        f.reset(0)
+        t0 = time.perf_counter_ns()
+        out = [f.update(v) for v in samples]
+        cost = (time.perf_counter_ns() - t0) / len(samples)
+        hold = out[RAMP:]
+        mean = sum(hold) / len(hold)
+        std = (sum((v - mean) ** 2 for v in hold) / len(hold)) ** 0.5
+        rows.append({
+            'filter': name,
+            'ns_per_sample': round(cost),
+            'lag_samples': lag(f),
+            'hold_std_g': round(std, 1),
+            'outside_precise': sum(1 for v in hold if abs(v - TARGET) > PU_PRECISE),
+        })
+    return rows
+
+if __name__ == '__main__':
+    noise = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rows = run(noise)
+    print("{:<8}{:>14}{:>13}{:>12}{:>17}".format(*rows[0].keys()))
+    for r in rows:
+        print("{:<8}{:>14}{:>13}{:>12}{:>17}".format(*r.values()))
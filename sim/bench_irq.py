@@ -0,0 +1,63 @@
+# IRQ path benchmark for the hx711 driver on the fake StateMachine.
+#
+# Pushes raw conversions into the simulated RX FIFO and measures the time
+# from the push to the end of the IRQ handler, which drains the FIFO into
+# a ring buffer with hx711.get_values_into().
+#
+# Usage: python -m sim.bench_irq [samples]
+
+import sys, time
+from array import array
+
+import sim
+sim.install()
+
+from machine import Pin
+from src.hx711 import hx711
+
+BUF_LEN = 16
+
+def run(samples):
+    hx = hx711(Pin(27), Pin(26))
+    buf = array('i', [0] * BUF_LEN)
+    state = {'idx': 0, 'count': 0, 'last': 0}
+
+    def handler(sm):
+        n = hx.get_values_into(buf, state['idx'])
+        state['idx'] = (state['idx'] + n) % BUF_LEN
+        state['count'] += n
+        state['last'] = buf[state['idx'] - 1]
+
+    hx.set_irq(handler)
+    sm = hx._sm
+    lat = array('l', [0] * samples)
+    for i in range(samples):
+        raw = (i * 7919) & 0xffffff
+        t0 = time.perf_counter_ns()
+        sm.push(raw)
+        lat[i] = time.perf_counter_ns() - t0
+        if state['last'] != hx711.get_twos_comp(raw):
+            raise SystemExit("sample %d: got %d, expected %d" % (i, state['last'], hx711.get_twos_comp(raw)))
+
+    # Stall the handler for longer than the FIFO can hold
+    hx.set_irq(None)
+    for i in range(hx711.get_rate_sps(hx711.rate.rate_80) // 10):
+        sm.push(i)
+    hx.set_irq(handler)
+    handler(sm)
+
+    ordered = sorted(lat)
+    return {
+        'samples': samples,
+        'received': state['count'],
+        'overruns': hx.overruns,
+        'min_us': ordered[0] / 1000,
+        'avg_us': sum(ordered) / samples / 1000,
+        'p99_us': ordered[int(samples * 0.99)] / 1000,
+        'max_us': ordered[-1] / 1000,
+    }
+
+if __name__ == '__main__':
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for key, val in run(samples).items():
+        print("{:<10}{}".format(key, round(val, 3) if isinstance(val, float) else val))
@@ -0,0 +1,159 @@
+# Tensioning cycle benchmark on the simulated head.
+#
+# Boots main.py in the simulator once per scenario, runs init(), clamps a
+# string and drives one start_tensioning() cycle, ended by the head button
+# a fixed time after the target is reached. Scenarios cover string
+# stiffness, pre-stretch and knot, FT_ADD, constant pull (CP_SW) and
+# lead screw backlash.
+#
+# For each scenario it reports:
+#   to_target_s      seconds from the start of the pull to the first target
+#   overshoot_g      peak tension above the first target, in grams
+#   count_add/sub    corrections before the target, from the log line
+#   reversals        direction changes of the slide during the pull
+#   settle_s         seconds from the first target until the final target
+#                    is met, longer than zero only after a pre-stretch
+#   outside_s        seconds outside +-PU_PRECISE of the final target
+#                    during the hold, settling included
+#   steps            motor steps for the whole cycle, reset included
+#
+# Results are written as JSON so pull speed and stability can be compared
+# release to release. Runs are deterministic: the same tree gives the same
+# numbers.
+#
+# Usage: python -m sim.bench_pull [out.json] [scenario ...]
+
+import json, os, sys, time
+
+import sim
+from sim.rig import LoadCell, String
+
+HOLD_S = 5
+TRAVEL = 40000
+MAX_STEPS = 40000   # saved travel, so init() does not rescale FT_ADD
+
+BASE = {
+    'stiffness': 1.2,
+    'PRE_STRECH': 0,
+    'KNOT_FLAG': 0,
+    'KNOT': 15,
+    'FT_ADD': 7,
+    'CP_SW': 1,
+    'CORR_COEF_AUTO': 1,
+    'backlash': 0,
+}
+
+SCENARIOS = [
+    ('base', {}),
+    ('soft', {'stiffness': 0.6}),
+    ('stiff', {'stiffness': 2.5}),
+    ('cp_off', {'CP_SW': 0}),
+    ('ps10', {'PRE_STRECH': 10}),
+    ('ps20_cp_off', {'PRE_STRECH': 20, 'CP_SW': 0}),
+    ('knot', {'KNOT_FLAG': 1}),
+    # learning would replace FT_ADD after the approach
+    ('ft3', {'FT_ADD': 3, 'CORR_COEF_AUTO': 0}),
+    ('ft12', {'FT_ADD': 12, 'CORR_COEF_AUTO': 0}),
+    ('ft12_stiff', {'FT_ADD': 12, 'stiffness': 2.5, 'CORR_COEF_AUTO': 0}),
+    ('backlash', {'backlash': 15}),
+    ('backlash_stiff', {'backlash': 15, 'stiffness': 2.5}),
+]
+
+def config(params):
+    # config.cfg as written by config_save(); only the keys we set
+    keys = ['PRE_STRECH', 'KNOT', 'FT_ADD', 'CP_SW', 'CORR_COEF_AUTO']
+    text = "MOTO_MAX_STEPS=%d," % MAX_STEPS
+    for k in keys:
+        text = text + "%s=%s," % (k, params[k])
+    return text
+
+def last_log(workdir):
+    with open(os.path.join(workdir, "logs.txt")) as f:
+        lines = f.read().split()
+    return lines[-1].split(",") if lines else None
+
+def run(name, overrides):
+    params = dict(BASE, **overrides)
+    s = sim.boot(files={"config.cfg": config(params)}, travel=TRAVEL, cell=LoadCell(noise_g=5), backlash=params['backlash'])
+    err = s.init()
+    main = s.main
+    main.KNOT_FLAG = params['KNOT_FLAG']
+    s.rig.clamp(String(stiffness=params['stiffness']))
+    steps0 = s.rig.steps
+    reversals0 = s.rig.reversals
+
+    trace = []
+    r = s.pull(hold_s=HOLD_S, trace=trace)
+
+    final_g = main.LB_CONV_G if params['KNOT_FLAG'] else int(main.DEFAULT_LB * 453.59237)
+    row = {
+        'scenario': name,
+        'params': params,
+        'init_error': err or None,
+        'target_g': main.LB_CONV_G,
+        'final_g': final_g,
+        'to_target_s': r['to_target_s'],
+        'overshoot_g': None,
+        'count_add': None,
+        'count_sub': None,
+        'reversals': s.rig.reversals - reversals0,
+        'settle_s': None,
+        'outside_s': None,
+        'steps': s.rig.steps - steps0,
+        'pull_s': r['seconds'],
+    }
+    if r['to_target_s'] is None:
+        return row
+
+    row['overshoot_g'] = max(0, round(r['peak_g'] - main.LB_CONV_G))
+    log = last_log(s.workdir)
+    if log:
+        row['count_add'] = int(log[7])
+        row['count_sub'] = int(log[8])
+
+    # the hold runs from the first target to the button press
+    start = r['to_target_s']
+    end = start + HOLD_S
+    settle = None
+    outside = 0
+    for i in range(1, len(trace)):
+        t, g = trace[i]
+        if t <= start or t > end:
+            continue
+        if abs(final_g - g) < main.PU_PRECISE:
+            if settle is None:
+                settle = t - start
+        else:
+            outside += t - trace[i - 1][0]
+    row['settle_s'] = None if settle is None else round(settle, 3)
+    row['outside_s'] = round(outside, 3)
+    return row
+
+def main(argv):
+    out = argv[0] if argv else None
+    names = argv[1:]
+    rows = []
+    t0 = time.time()
+    for name, overrides in SCENARIOS:
+        if names and name not in names:
+            continue
+        rows.append(run(name, overrides))
+    result = {
+        'version': sys.modules['main'].VERSION,
+        'hold_s': HOLD_S,
+        'wall_s': round(time.time() - t0, 1),
+        'scenarios': rows,
+    }
+    text = json.dumps(result, indent=1)
+    if out:
+        with open(out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    fmt = "{:<14}{:>9}{:>8}{:>5}{:>5}{:>5}{:>9}{:>10}{:>7}"
+    print(fmt.format('scenario', 'target_s', 'over_g', 'add', 'sub', 'rev', 'settle_s', 'outside_s', 'steps'), file=sys.stderr)
+    for r in rows:
+        print(fmt.format(r['scenario'], *[str(r[k]) for k in ('to_target_s', 'overshoot_g', 'count_add', 'count_sub', 'reversals', 'settle_s', 'outside_s', 'steps')]), file=sys.stderr)
+
+if __name__ == '__main__':
+    main([os.path.abspath(a) if a.endswith('.json') else a for a in sys.argv[1:]])
@@ -0,0 +1,115 @@
+# Virtual clock and core scheduler
+#
+# All simulated time lives here. The main thread (core 0) moves time
+# forward when it sleeps or when it is charged for the cost of a hardware
+# access. Due events (HX711 conversions, button presses, ...) run in time
+# order while the clock advances.
+#
+# Code started with _thread.start_new_thread() (core 1) runs in a real
+# thread, but only one thread runs at a time: core 1 is resumed from an
+# event and hands control back when it sleeps, so runs are deterministic.
+
+import heapq, threading
+
+class _Task:
+
+    def __init__(self, clock, func, args, kwargs):
+        self.clock = clock
+        self.go = threading.Event()
+        self.yielded = threading.Event()
+        self.done = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(func, args, kwargs), daemon=True)
+
+    def _run(self, func, args, kwargs):
+        self.go.wait()
+        self.go.clear()
+        try:
+            func(*args, **kwargs)
+        except BaseException as e:
+            self.error = e
+        self.done = True
+        self.yielded.set()
+
+    def resume(self):
+        # Runs the task until it sleeps again. Called from the main thread.
+        if self.done or self.clock.tasks.get(self.thread.ident) is not self:
+            return
+        self.go.set()
+        self.yielded.wait()
+        self.yielded.clear()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def sleep(self, us):
+        self.clock.at(self.clock.now + us, self.resume)
+        self.yielded.set()
+        self.go.wait()
+        self.go.clear()
+
+class Clock:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Drops all events and tasks. Old core 1 threads are never resumed.
+        self.now = 0
+        self.events = []
+        self.seq = 0
+        self.busy = False
+        self.tasks = {}
+        self.main = threading.get_ident()
+
+    def at(self, when, callback):
+        # Schedules callback() at the absolute time when (us)
+        self.seq += 1
+        heapq.heappush(self.events, (when, self.seq, callback))
+
+    def every(self, period, callback, start=None):
+        # Schedules callback() every period us
+        def tick():
+            callback()
+            self.at(self.now + period, tick)
+        self.at(self.now + period if start is None else start, tick)
+
+    def advance(self, us):
+        # Moves time forward by us, running every event that falls due
+        target = self.now + max(0, int(us))
+        events = self.events
+        while events and events[0][0] <= target:
+            when, seq, callback = heapq.heappop(events)
+            if when > self.now:
+                self.now = when
+            busy, self.busy = self.busy, True
+            try:
+                callback()
+            finally:
+                self.busy = busy
+        self.now = target
+
+    def run_until(self, when):
+        self.advance(when - self.now)
+
+    def sleep(self, us):
+        task = self.tasks.get(threading.get_ident())
+        if task is not None:
+            task.sleep(max(1, int(us)))
+        elif not self.busy:
+            self.advance(us)
+
+    def charge(self, us):
+        # Cost of a hardware access on core 0. Core 1 runs in parallel and
+        # event callbacks (IRQ handlers) are not charged.
+        if not self.busy and threading.get_ident() == self.main:
+            self.advance(us)
+
+    def spawn(self, func, args=(), kwargs=None):
+        task = _Task(self, func, args, kwargs or {})
+        task.thread.start()
+        self.tasks[task.thread.ident] = task
+        self.at(self.now, task.resume)
+        return task
+
+clock = Clock()
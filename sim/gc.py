@@ -0,0 +1,23 @@
+# Fake gc module. A collection is not run, only charged to the clock.
+
+from sim.clock import clock
+
+COLLECT_US = 600 # typical gc.collect() on a Pico with a busy heap
+
+def collect():
+    clock.charge(COLLECT_US)
+
+def enable():
+    pass
+
+def disable():
+    pass
+
+def mem_free():
+    return 100000
+
+def mem_alloc():
+    return 100000
+
+def threshold(amount=None):
+    return -1
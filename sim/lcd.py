@@ -0,0 +1,124 @@
+# HD44780 character LCD behind a PCF8574 I2C expander
+#
+# Decodes the expander port writes the way the LCD sees them: a nibble is
+# latched on each falling edge of E, two nibbles make a byte in 4-bit mode.
+# Keeps DDRAM, the address counter and the display flags, and renders the
+# visible 20x4 screen.
+
+# PCF8574 pins, as wired in src/pico_i2c_lcd.py
+MASK_RS = 0x01
+MASK_E = 0x04
+MASK_BACKLIGHT = 0x08
+
+class Pcf8574Lcd:
+
+    def __init__(self, columns=20, lines=4):
+        self.columns = columns
+        self.lines = lines
+        self.port = 0
+        self.four_bit = False
+        self.high = None        # first nibble of a 4-bit transfer
+        self.ddram = bytearray(b' ' * 0x80)
+        self.addr = 0
+        self.increment = True
+        self.display = False
+        self.cursor = False
+        self.blink = False
+        self.backlight = False
+        self.commands = 0
+        self.data = 0
+
+    # I2C side
+
+    def write(self, buf):
+        for port in buf:
+            if self.port & MASK_E and not port & MASK_E:
+                self._latch(self.port)
+            self.port = port
+            self.backlight = bool(port & MASK_BACKLIGHT)
+
+    def _latch(self, port):
+        nibble = port >> 4
+        rs = port & MASK_RS
+        if not self.four_bit:
+            # 8-bit interface: only the upper data lines are wired
+            self._byte(nibble << 4, rs)
+            return
+        if self.high is None:
+            self.high = nibble
+        else:
+            value = (self.high << 4) | nibble
+            self.high = None
+            self._byte(value, rs)
+
+    def _byte(self, value, rs):
+        if rs:
+            self.data += 1
+            self.ddram[self.addr] = value
+            self._step()
+            return
+
+        self.commands += 1
+        if value & 0x80:                    # set DDRAM address
+            self.addr = value & 0x7f
+        elif value & 0x40:                  # set CGRAM address, not rendered
+            pass
+        elif value & 0x20:                  # function set
+            if not value & 0x10:
+                self.four_bit = True
+                self.high = None
+        elif value & 0x10:                  # cursor/display shift
+            pass
+        elif value & 0x08:                  # display control
+            self.display = bool(value & 0x04)
+            self.cursor = bool(value & 0x02)
+            self.blink = bool(value & 0x01)
+        elif value & 0x04:                  # entry mode
+            self.increment = bool(value & 0x02)
+        elif value & 0x02:                  # return home
+            self.addr = 0
+        elif value & 0x01:                  # clear
+            self.ddram[:] = b' ' * 0x80
+            self.addr = 0
+
+    def _step(self):
+        # 2-line mode: 0x00-0x27 and 0x40-0x67, wrapping into each other
+        if self.increment:
+            self.addr += 1
+            if self.addr == 0x28:
+                self.addr = 0x40
+            elif self.addr >= 0x68:
+                self.addr = 0
+        else:
+            self.addr -= 1
+            if self.addr < 0:
+                self.addr = 0x67
+            elif self.addr == 0x3f:
+                self.addr = 0x27
+
+    # Simulation side
+
+    def row_addr(self, y):
+        addr = 0x40 if y & 1 else 0
+        if y & 2:
+            addr += self.columns
+        return addr
+
+    def screen(self):
+        # Visible text, one string per line
+        rows = []
+        for y in range(self.lines):
+            a = self.row_addr(y)
+            rows.append(self.ddram[a:a + self.columns].decode('latin-1'))
+        return rows
+
+    def cursor_xy(self):
+        for y in range(self.lines):
+            a = self.row_addr(y)
+            if a <= self.addr < a + self.columns:
+                return (self.addr - a, y)
+        return None
+
+    def __str__(self):
+        border = '+' + '-' * self.columns + '+'
+        return '\n'.join([border] + ['|' + r + '|' for r in self.screen()] + [border])
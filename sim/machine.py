@@ -0,0 +1,197 @@
+# Fake machine module
+#
+# Pins with the same id share one level, so simulated hardware can watch
+# outputs and drive inputs. Accesses from core 0 are charged to the
+# virtual clock with the rough cost of the MicroPython call on a Pico.
+
+from sim.clock import clock
+
+COST_US = {
+    'pin_write': 4,
+    'pin_read': 3,
+    'mem32': 1,         # one machine.mem32 access
+    'i2c_call': 30,     # software overhead of one writeto()
+}
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    levels = {}
+    watchers = {}
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        __class__.levels.setdefault(id, 0)
+        if value is not None:
+            self._set(value)
+
+    def __repr__(self):
+        return "Pin(GPIO%d)" % self.id
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        if value is not None:
+            self._set(value)
+
+    def value(self, x=None):
+        if x is None:
+            clock.charge(COST_US['pin_read'])
+            return __class__.levels[self.id]
+        clock.charge(COST_US['pin_write'])
+        self._set(x)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def _set(self, x):
+        level = 1 if x else 0
+        if __class__.levels.get(self.id) != level:
+            __class__.levels[self.id] = level
+            for watcher in __class__.watchers.get(self.id, ()):
+                watcher(self.id, level)
+
+    # Simulation side
+
+    @classmethod
+    def drive(cls, id, level):
+        # Sets the level seen on an input pin, free of charge
+        cls.levels[id] = 1 if level else 0
+
+    @classmethod
+    def write_port(cls, value, mask):
+        # Sets the output levels of the pins in mask at once, then tells
+        # the watchers, so they never see a half written port
+        changed = []
+        for id in range(30):
+            if mask >> id & 1:
+                level = value >> id & 1
+                if cls.levels.get(id) != level:
+                    cls.levels[id] = level
+                    changed.append(id)
+        for id in changed:
+            for watcher in cls.watchers.get(id, ()):
+                watcher(id, cls.levels[id])
+
+    @classmethod
+    def port(cls):
+        # GPIO levels as the SIO GPIO_IN/GPIO_OUT registers read them
+        value = 0
+        for id, level in cls.levels.items():
+            if level and isinstance(id, int) and id < 30:
+                value |= 1 << id
+        return value
+
+    @classmethod
+    def watch(cls, id, callback):
+        # callback(id, level) runs whenever an output pin changes level
+        cls.watchers.setdefault(id, []).append(callback)
+
+    @classmethod
+    def reset_all(cls):
+        cls.levels.clear()
+        cls.watchers.clear()
+
+class I2C:
+    devices = {}
+
+    def __init__(self, id, scl=None, sda=None, freq=400000):
+        self.id = id
+        self.freq = freq
+        self.transactions = 0
+        self.bytes = 0
+
+    def scan(self):
+        return sorted(__class__.devices)
+
+    def writeto(self, addr, buf, stop=True):
+        dev = __class__.devices.get(addr)
+        if dev is None:
+            raise OSError(5) # EIO, no ACK
+        self.transactions += 1
+        self.bytes += len(buf)
+        # start + address + data, 9 bits per byte on the wire
+        clock.charge(COST_US['i2c_call'] + (len(buf) + 1) * 9 * 1000000 // self.freq)
+        dev.write(bytes(buf))
+        return len(buf)
+
+    # Simulation side
+
+    @classmethod
+    def attach(cls, addr, device):
+        cls.devices[addr] = device
+
+    @classmethod
+    def reset_all(cls):
+        cls.devices.clear()
+
+class _Mem:
+    # Word addressed register file. Registers in W1C are write-1-to-clear.
+    # The SIO GPIO registers act on the Pin levels: GPIO_IN and GPIO_OUT
+    # read them, GPIO_OUT and its SET/CLR/XOR aliases write them. TIMERAWL
+    # reads the virtual clock.
+
+    W1C = {
+        0x50200008, # PIO0 FDEBUG
+        0x50300008, # PIO1 FDEBUG
+    }
+    GPIO_IN = 0xd0000004
+    GPIO_OUT = 0xd0000010
+    GPIO_OUT_SET = 0xd0000014
+    GPIO_OUT_CLR = 0xd0000018
+    GPIO_OUT_XOR = 0xd000001c
+    TIMER_RAWL = 0x40054028
+
+    def __init__(self):
+        self.regs = {}
+
+    def __getitem__(self, addr):
+        clock.charge(COST_US['mem32'])
+        if addr == self.GPIO_IN or addr == self.GPIO_OUT:
+            return Pin.port()
+        if addr == self.TIMER_RAWL:
+            return clock.now & 0xffffffff
+        return self.regs.get(addr, 0)
+
+    def __setitem__(self, addr, value):
+        clock.charge(COST_US['mem32'])
+        if addr == self.GPIO_OUT:
+            Pin.write_port(value, 0x3fffffff)
+        elif addr == self.GPIO_OUT_SET:
+            Pin.write_port(value, value)
+        elif addr == self.GPIO_OUT_CLR:
+            Pin.write_port(0, value)
+        elif addr == self.GPIO_OUT_XOR:
+            Pin.write_port(Pin.port() ^ value, value)
+        elif addr in self.W1C:
+            self.regs[addr] = self.regs.get(addr, 0) & ~value
+        else:
+            self.regs[addr] = value & 0xffffffff
+
+    def set_bits(self, addr, bits):
+        # Used by the fake peripherals to raise hardware flags
+        self.regs[addr] = self.regs.get(addr, 0) | bits
+
+mem32 = _Mem()
+
+def freq(hz=None):
+    return 125000000
+
+def reset():
+    raise SystemExit("machine.reset()")
@@ -0,0 +1,171 @@
+# Physical model of the tension head
+#
+# A lead screw slide driven through the TB6600 inputs, the two limit
+# switches, a string with stiffness, creep and a breaking load, and the
+# HX711 load cell that feeds the PIO RX FIFO. Positions are in motor
+# steps from the front limit switch; tension grows as the slide moves
+# towards the rear switch. With backlash the slide lags the motor by
+# that many steps of lead screw play after each reversal.
+
+import random
+
+from sim.clock import clock
+from sim.machine import Pin
+from sim.rp2 import StateMachine
+
+# GPIO numbers, as wired in main.py
+PUL_N = 4
+PUL_P = 5
+DIR_N = 2
+DIR_P = 3
+SW_FRONT = 6
+SW_REAR = 7
+
+class String:
+
+    def __init__(self, stiffness=1.2, slack=6000, creep=0.04, creep_tau=4.0, break_g=25000):
+        """A clamped string
+
+        Args:
+            stiffness: grams per step once the slack is taken up
+            slack: steps from the front switch to where tension starts
+            creep: fraction of the stretch the string gives up over time
+            creep_tau: time constant of the creep, in seconds
+            break_g: tension at which the string snaps
+        """
+        self.stiffness = stiffness
+        self.slack = slack
+        self.creep = creep
+        self.creep_tau = creep_tau * 1000000
+        self.break_g = break_g
+        self.elongation = 0.0   # steps of permanent stretch
+        self.broken = False
+        self.updated = 0
+
+    def tension(self, pos, now):
+        if self.broken:
+            return 0.0
+        stretch = pos - self.slack
+        # creep moves the elongation towards creep * stretch
+        dt = now - self.updated
+        self.updated = now
+        if dt > 0 and self.creep_tau > 0:
+            target = max(0.0, self.creep * stretch)
+            k = min(1.0, dt / self.creep_tau)
+            self.elongation += (target - self.elongation) * k
+        g = self.stiffness * (stretch - self.elongation)
+        if g <= 0:
+            return 0.0
+        if g >= self.break_g:
+            self.broken = True
+            return 0.0
+        return g
+
+class LoadCell:
+
+    def __init__(self, counts_per_g=100.0, zero=150000, noise_g=5.0, drift_g_min=0.0, seed=1):
+        """Load cell and HX711 at gain 128
+
+        Args:
+            counts_per_g: raw counts per gram (100 matches HX 20.00)
+            zero: raw value with no load
+            noise_g: standard deviation of the noise, in grams
+            drift_g_min: zero drift, in grams per minute
+        """
+        self.counts_per_g = counts_per_g
+        self.zero = zero
+        self.noise_g = noise_g
+        self.drift_g_min = drift_g_min
+        self.random = random.Random(seed)
+        self.dead = False
+
+    def raw(self, grams, now):
+        drift = self.drift_g_min * now / 60000000
+        g = grams + drift + self.random.gauss(0, self.noise_g)
+        v = int(self.zero + g * self.counts_per_g)
+        return max(-0x800000, min(0x7fffff, v))
+
+class Rig:
+
+    def __init__(self, travel=40000, start=3000, string=None, cell=None, sps=80, sm_index=0, backlash=0):
+        """The whole head
+
+        Args:
+            travel: steps between the front and the rear limit switch
+            start: slide position at power on
+            string: clamped String, or None when nothing is clamped
+            cell: LoadCell, defaults to a quiet one
+            sps: HX711 output rate
+            backlash: steps the motor turns after a reversal before the
+                slide follows
+        """
+        self.travel = travel
+        self.pos = start        # motor
+        self.slide = start      # between pos - backlash and pos
+        self.backlash = backlash
+        self.string = string
+        self.cell = cell or LoadCell()
+        self.sm = StateMachine(sm_index)
+        self.steps = 0
+        self.reversals = 0
+        self.peak_g = 0.0
+        self.pul = 0
+        self.dir = 0
+        self._last_dir = None
+        for pin in (PUL_N, PUL_P, DIR_N, DIR_P):
+            Pin.watch(pin, self._on_motor_pin)
+        self._update_switches()
+        clock.every(1000000 // sps, self._sample)
+
+    # Slide
+
+    def _on_motor_pin(self, id, level):
+        # TB6600 opto inputs: on when + is high and - is low. A step is
+        # taken when the pulse opto turns off.
+        lv = Pin.levels
+        pul = 1 if lv.get(PUL_P) and not lv.get(PUL_N) else 0
+        self.dir = 1 if lv.get(DIR_P) and not lv.get(DIR_N) else 0
+        if self.pul and not pul:
+            self.step(-1 if self.dir else 1)
+        self.pul = pul
+
+    def step(self, direction):
+        if self._last_dir is not None and direction != self._last_dir:
+            self.reversals += 1
+        self._last_dir = direction
+        self.pos += direction
+        self.slide = min(self.pos, max(self.slide, self.pos - self.backlash))
+        self.steps += 1
+        self._update_switches()
+        self.peak_g = max(self.peak_g, self.tension())
+
+    def _update_switches(self):
+        Pin.drive(SW_FRONT, self.slide <= 0)
+        Pin.drive(SW_REAR, self.slide >= self.travel)
+
+    def tension(self):
+        if self.string is None:
+            return 0.0
+        return self.string.tension(self.slide, clock.now)
+
+    # Load cell
+
+    def _sample(self):
+        if self.cell.dead or not self.sm.active():
+            return
+        self.sm.push(self.cell.raw(self.tension(), clock.now) & 0xffffff)
+
+    # Operator
+
+    def clamp(self, string):
+        self.string = string
+        string.updated = clock.now
+
+    def release(self):
+        self.string = None
+
+    def press(self, pin, at=None, hold_ms=100):
+        # Presses a button at the absolute time at (us), or now
+        when = clock.now if at is None else at
+        clock.at(when, lambda: Pin.drive(pin, 1))
+        clock.at(when + hold_ms * 1000, lambda: Pin.drive(pin, 0))
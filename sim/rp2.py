@@ -0,0 +1,230 @@
+# Fake rp2 module
+#
+# StateMachine models the RX/TX FIFOs and the PIO IRQ of one state machine.
+# Programs are not run instruction by instruction. Simulated peripherals
+# feed the HX711 state machine with push(); programs listed in MODELS get
+# a behavioural model that runs on the virtual clock instead.
+
+from sim.clock import clock
+from sim.machine import COST_US, Pin, mem32
+
+FIFO_DEPTH = 4
+
+class PIO:
+    IN_LOW = 0
+    IN_HIGH = 1
+    OUT_LOW = 2
+    OUT_HIGH = 3
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+    JOIN_NONE = 0
+    JOIN_TX = 1
+    JOIN_RX = 2
+    IRQ_SM0 = 0x100
+    IRQ_SM1 = 0x200
+    IRQ_SM2 = 0x400
+    IRQ_SM3 = 0x800
+
+    def __init__(self, id):
+        self.id = id
+
+    def state_machine(self, id, *args, **kwargs):
+        return StateMachine((self.id << 2) + id, *args, **kwargs)
+
+    def add_program(self, program):
+        pass
+
+    def remove_program(self, program=None):
+        pass
+
+class _Program:
+    # What asm_pio returns. The program body is kept but never assembled.
+
+    def __init__(self, func, options):
+        self.func = func
+        self.options = options
+
+def asm_pio(**options):
+    def decorator(func):
+        return _Program(func, options)
+    return decorator
+
+def asm_pio_encode(instr, sideset_count, sideset_opt=False):
+    # Instructions stay text, StateMachine.exec() and the models read them
+    return instr
+
+class _StepPulse:
+    # src/stepper.py: pulls the step count and the delay loop count of a
+    # segment, then drives set_base high for delay + 4 cycles once every
+    # 2 * delay + 10 cycles until x runs out or jmp_pin is high, pushes x
+    # and goes on with the next segment. One cycle is 1 us at the 1 MHz
+    # the driver asks for.
+
+    def __init__(self, sm):
+        self.sm = sm
+        self.gen = 0
+        self.busy = False
+        self.x = 0
+        self.isr = 0
+
+    def kick(self):
+        # The program waits on pull(block) until both words are there
+        sm = self.sm
+        if self.busy or not sm.running or len(sm.tx) < 2:
+            return
+        self.x = sm.tx.pop(0)
+        delay = sm.tx.pop(0)
+        self.high = delay + 4
+        self.period = 2 * delay + 10
+        self.busy = True
+        self.gen += 1
+        gen = self.gen
+        clock.at(clock.now + 5, lambda: self._step(gen))
+
+    def _step(self, gen):
+        if gen != self.gen:
+            return
+        limit = self.sm.options.get('jmp_pin')
+        if limit is not None and Pin.levels.get(limit.id):
+            self._done(gen)
+            return
+        self.sm.options['set_base']._set(1)
+        self.x -= 1
+        start = clock.now
+        clock.at(start + self.high, lambda: self._low(gen, start))
+
+    def _low(self, gen, start):
+        if gen != self.gen:
+            return
+        self.sm.options['set_base']._set(0)
+        if self.x == 0:
+            clock.at(start + self.period - 1, lambda: self._done(gen))
+        else:
+            clock.at(start + self.period, lambda: self._step(gen))
+
+    def _done(self, gen):
+        if gen != self.gen:
+            return
+        self.busy = False
+        self.sm.push(self.x)
+        self.kick()
+
+    def stop(self):
+        # active(0): pending pulses never happen
+        self.gen += 1
+
+    def restart(self):
+        self.gen += 1
+        self.busy = False
+
+    def exec(self, instr):
+        if instr == "set(pins, 0)":
+            self.sm.options['set_base']._set(0)
+        elif instr == "mov(isr, x)":
+            self.isr = self.x
+        elif instr == "push(noblock)":
+            self.sm.push(self.isr)
+        elif instr == "pull(noblock)" and self.sm.tx:
+            self.sm.tx.pop(0)
+
+MODELS = {
+    'pio_stepper.program': _StepPulse,
+}
+
+class StateMachine:
+    _instances = {}
+
+    def __new__(cls, id, *args, **kwargs):
+        # Like the firmware, one object per hardware state machine
+        sm = cls._instances.get(id)
+        if sm is None:
+            sm = object.__new__(cls)
+            sm.id = id
+            sm.rx = []
+            sm.tx = []
+            sm.running = False
+            sm.program = None
+            sm.options = {}
+            sm.handler = None
+            sm.hard = False
+            sm.model = None
+            cls._instances[id] = sm
+        return sm
+
+    def __init__(self, id, program=None, **kwargs):
+        if program is not None:
+            self.init(program, **kwargs)
+
+    def init(self, program, **kwargs):
+        if program is not self.program or self.model is None:
+            model = MODELS.get(program.func.__qualname__)
+            self.model = model(self) if model else None
+        self.program = program
+        self.options = kwargs
+
+    def active(self, value=None):
+        if value is None:
+            return self.running
+        self.running = bool(value)
+        if self.model is not None:
+            if self.running:
+                self.model.kick()
+            else:
+                self.model.stop()
+
+    def restart(self):
+        if self.model is not None:
+            self.model.restart()
+        else:
+            self.rx.clear()
+
+    def exec(self, instr):
+        clock.charge(COST_US['pin_write'])
+        if self.model is not None:
+            self.model.exec(instr)
+        elif instr.startswith("pull") and self.tx:
+            self.tx.pop(0)
+
+    def irq(self, handler=None, trigger=0x0f00, hard=False):
+        self.handler = handler
+        self.hard = hard
+
+    def rx_fifo(self):
+        clock.charge(COST_US['pin_read'])
+        return len(self.rx)
+
+    def tx_fifo(self):
+        return len(self.tx)
+
+    def get(self, buf=None, shift=0):
+        # Blocks on an empty FIFO until a simulated peripheral pushes
+        while not self.rx:
+            if clock.busy or not clock.events:
+                raise RuntimeError("RX FIFO empty, the firmware would block here")
+            clock.advance(clock.events[0][0] - clock.now)
+        return self.rx.pop(0) >> shift
+
+    def put(self, value, shift=0):
+        clock.charge(COST_US['pin_write'])
+        if len(self.tx) < FIFO_DEPTH:
+            self.tx.append(value << shift)
+        if self.model is not None:
+            self.model.kick()
+
+    # Simulation side
+
+    def push(self, value):
+        # Pushes a word into the RX FIFO like an autopush followed by
+        # irq(rel(0)). A full FIFO stalls the program, so the word is lost
+        # and FDEBUG.RXSTALL is raised.
+        if len(self.rx) >= FIFO_DEPTH:
+            mem32.set_bits((0x50300008 if self.id >> 2 else 0x50200008), 1 << (self.id & 3))
+            return False
+        self.rx.append(value & 0xffffffff)
+        if self.handler is not None:
+            self.handler(self)
+        return True
+
+    @classmethod
+    def reset_all(cls):
+        cls._instances.clear()
@@ -0,0 +1,12 @@
+# Fake _thread module. New threads run as core 1 on the virtual clock.
+
+import _thread
+
+from sim.clock import clock
+
+allocate_lock = _thread.allocate_lock
+get_ident = _thread.get_ident
+
+def start_new_thread(func, args, kwargs=None):
+    clock.spawn(func, args, kwargs)
+    return 0
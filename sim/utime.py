@@ -0,0 +1,33 @@
+# Fake time/utime module running on the virtual clock
+
+from sim.clock import clock
+
+def time():
+    return clock.now // 1000000
+
+def time_ns():
+    return clock.now * 1000
+
+def sleep(seconds):
+    clock.sleep(round(seconds * 1000000))
+
+def sleep_ms(ms):
+    clock.sleep(ms * 1000)
+
+def sleep_us(us):
+    clock.sleep(us)
+
+def ticks_ms():
+    return clock.now // 1000
+
+def ticks_us():
+    return clock.now
+
+def ticks_cpu():
+    return clock.now
+
+def ticks_add(ticks, delta):
+    return ticks + delta
+
+def ticks_diff(ticks1, ticks2):
+    return ticks1 - ticks2
@@ -0,0 +1,176 @@
+# Raw HX711 value to grams conversion
+#
+# The single HX711_CAL scalar is turned into an integer multiply-and-shift
+# once, whenever it changes, so converting a sample needs no float math.
+# An optional calibration table replaces the scalar with a piecewise
+# linear curve; a bucket index over the raw range finds the segment of a
+# sample in O(1).
+#
+# Intermediate products are kept below 2**30 so they stay MicroPython
+# small ints and convert() never allocates.
+#
+# gram_scale does the same for the displayed units: grams to tenths of a
+# pound or kilogram with one multiply and shift, rounded to nearest.
+
+PRE_SHIFT = 6    # raw values are divided by 2**PRE_SHIFT before the multiply
+SHIFT = 13       # fractional bits of the per-segment multiplier
+BUCKETS = 64     # size of the segment index
+UNIT_SHIFT = 20  # fractional bits of a gram_scale, small ints up to about 45 kg
+
+class raw_to_gram:
+
+    def __init__(self, cal: float = 20.0) -> None:
+        """Create a converter
+
+        Args:
+            cal (float, optional): HX711_CAL. Defaults to 20.0.
+        """
+        self._raw0 = []     # segment start, raw
+        self._g0 = []       # segment start, grams
+        self._mul = []      # segment slope, grams per raw << (SHIFT + PRE_SHIFT)
+        self._index = bytearray(BUCKETS + 1)
+        self._lo = 0
+        self._hi = 0
+        self._bucket_shift = 0
+        self._table = None
+        self.set_scale(cal)
+
+    @classmethod
+    def grams_per_raw(cls, cal: float) -> float:
+        """Returns the slope given by HX711_CAL
+
+        Args:
+            cal (float): HX711_CAL
+
+        Returns:
+            float:
+        """
+        return cal / 2000
+
+    def set_scale(self, cal: float) -> None:
+        """Sets the HX711_CAL scalar. Ignored while a table is loaded.
+
+        Args:
+            cal (float): HX711_CAL
+        """
+        self._cal = cal
+        if self._table is None:
+            self._build([(0, 0), (1, self.grams_per_raw(cal))])
+
+    def set_table(self, points) -> None:
+        """Loads a calibration table, or clears it
+
+        Args:
+            points (list|None): (raw, grams) pairs relative to the zero, at
+                least two, in any order. Only the first point given for a
+                raw value is kept. None goes back to the scalar.
+
+        Raises:
+            ValueError: fewer than two distinct raw values
+        """
+        if points is None:
+            self._table = None
+            self.set_scale(self._cal)
+            return
+
+        seen = {}
+        for raw, g in points:
+            if int(raw) not in seen:
+                seen[int(raw)] = (raw, g)
+        points = sorted(seen.values())
+        if len(points) < 2:
+            raise ValueError("calibration table needs at least two points")
+        self._build(points)
+        self._table = points
+
+    def _build(self, points) -> None:
+        """Precomputes segment multipliers and the bucket index
+
+        Args:
+            points (list): sorted (raw, grams) pairs
+
+        Raises:
+            ValueError: a segment of zero width. Nothing is changed.
+        """
+        raw0 = []
+        g0 = []
+        mul = []
+        for k in range(len(points) - 1):
+            r0, v0 = points[k]
+            r1, v1 = points[k + 1]
+            if int(r1) <= int(r0):
+                raise ValueError("calibration table repeats a raw value")
+            raw0.append(int(r0))
+            g0.append(int(v0))
+            mul.append(int(round((v1 - v0) / (r1 - r0) * (1 << (SHIFT + PRE_SHIFT)))))
+
+        lo = raw0[0]
+        hi = int(points[-1][0])
+        shift = 0
+        while ((hi - lo) >> shift) >= BUCKETS:
+            shift += 1
+
+        index = bytearray(BUCKETS + 1)
+        k = 0
+        last = len(raw0) - 1
+        for b in range(BUCKETS + 1):
+            r = lo + (b << shift)
+            while k < last and r >= raw0[k + 1]:
+                k += 1
+            index[b] = k
+
+        self._lo = lo
+        self._hi = hi
+        self._bucket_shift = shift
+        self._index = index
+        self._raw0 = raw0
+        self._g0 = g0
+        self._mul = mul
+
+    def convert(self, raw: int) -> int:
+        """Returns the grams for a raw value relative to the zero
+
+        Args:
+            raw (int):
+
+        Returns:
+            int:
+        """
+        raw0 = self._raw0
+        last = len(raw0) - 1
+        if raw <= self._lo:
+            k = 0
+        elif raw >= self._hi:
+            k = last
+        else:
+            k = self._index[(raw - self._lo) >> self._bucket_shift]
+            while k < last and raw >= raw0[k + 1]:
+                k += 1
+        return self._g0[k] + ((((raw - raw0[k]) >> PRE_SHIFT) * self._mul[k]) >> SHIFT)
+
+class gram_scale:
+
+    def __init__(self, factor: float, point: int = 1) -> None:
+        """Create a gram to display unit conversion
+
+        Args:
+            factor (float): units per gram, e.g. 0.0022 for pounds
+            point (int, optional): decimals kept, the result is in units of
+                10**-point. Defaults to 1.
+        """
+        self.point: int = point
+        self._mul = int(round(factor * 10 ** point * (1 << UNIT_SHIFT)))
+        self._half = 1 << (UNIT_SHIFT - 1)
+
+    def convert(self, g: int) -> int:
+        """Returns grams in the unit, rounded
+
+        Args:
+            g (int):
+
+        Returns:
+            int: units of 10**-point
+        """
+        if g < 0:
+            return -((-g * self._mul + self._half) >> UNIT_SHIFT)
+        return (g * self._mul + self._half) >> UNIT_SHIFT
@@ -0,0 +1,188 @@
+# Latest-value display service
+#
+# Owns the LCD so that the code moving the slide and reading the tension
+# never waits on the I2C bus. Writers only put characters into a frame
+# buffer in RAM: each show() overwrites the cells of its field, so a
+# field that is written again before it reaches the screen just shows
+# its latest value. The cursor position and mode are kept the same way.
+#
+# poll() is called from a background loop, the core 1 monitoring loop in
+# main.py, and at most once per frame copies the buffer and sends the
+# cells that differ from the screen through an lcd_shadow (src/shadow.py),
+# then puts the cursor back where the writers last asked for it. The lock
+# is only held while the buffer is copied, never during an I2C transfer.
+#
+# number() writes an integer or fixed-point value straight into the
+# buffer, digit by digit, so the periodic readouts allocate nothing.
+
+import _thread
+import time
+
+CURSOR_OFF = 0
+CURSOR_ON = 1
+CURSOR_BLINK = 2
+
+class display:
+
+    def __init__(self, shadow, frame_ms: int = 50) -> None:
+        """Create a display service
+
+        Args:
+            shadow (src.shadow.lcd_shadow): screen copy of the LCD, only used by
+                poll() from now on
+            frame_ms (int, optional): shortest time between two frames. Defaults
+                to 50.
+        """
+        self.shadow = shadow
+        self.rows: int = shadow.rows
+        self.cols: int = shadow.cols
+        self.frame_ms: int = frame_ms
+        self._lock = _thread.allocate_lock()
+        self._frame = bytearray(b' ' * (self.rows * self.cols))  # written by show()
+        self._out = bytearray(len(self._frame))                  # copy being sent
+        self._dirty = False
+        self._x = 0             # cursor asked for
+        self._y = 0
+        self._mode = CURSOR_OFF
+        self._lcd_x = -1        # cursor on the LCD, -1 = unknown
+        self._lcd_y = -1
+        self._lcd_mode = CURSOR_OFF
+        self._t = time.ticks_ms()
+        self.frames: int = 0    # frames that sent something
+
+    def show(self, text: str, x: int, y: int, length: int) -> None:
+        """Puts text in a field, cut or padded with spaces to length (NON-BLOCKING)
+
+        Args:
+            text (str): ASCII text
+            x (int): first column
+            y (int): line
+            length (int): width of the field, cut at the end of the line
+        """
+        length = min(length, self.cols - x)
+        if length <= 0:
+            return
+        frame = self._frame
+        base = y * self.cols + x
+        n = min(len(text), length)
+        self._lock.acquire()
+        for i in range(n):
+            frame[base + i] = ord(text[i])
+        for i in range(n, length):
+            frame[base + i] = 32
+        self._dirty = True
+        self._lock.release()
+
+    def number(self, value: int, x: int, y: int, length: int, point: int = 0) -> None:
+        """Puts a number in a field, right-aligned (NON-BLOCKING, no allocation)
+
+        Args:
+            value (int): value in units of 10**-point, clamped to what fits
+            x (int): first column
+            y (int): line
+            length (int): width of the field, cut at the end of the line
+            point (int, optional): decimals shown. Defaults to 0.
+        """
+        length = min(length, self.cols - x)
+        if length <= 0:
+            return
+        neg = value < 0
+        if neg:
+            value = -value
+        # largest value that fits: all nines except the sign and the point
+        top = 1
+        for i in range(length - (1 if point else 0) - (1 if neg else 0)):
+            top *= 10
+        value = min(value, top - 1)
+
+        frame = self._frame
+        pos = y * self.cols + x + length - 1
+        end = pos - length
+        self._lock.acquire()
+        # digits from the right, at least one before the point
+        last = point + 1 if point else 0
+        i = 0
+        while pos > end and (value or i <= last):
+            if point and i == point:
+                frame[pos] = 46
+            else:
+                frame[pos] = 48 + value % 10
+                value //= 10
+            pos -= 1
+            i += 1
+        if neg and pos > end:
+            frame[pos] = 45
+            pos -= 1
+        while pos > end:
+            frame[pos] = 32
+            pos -= 1
+        self._dirty = True
+        self._lock.release()
+
+    def cursor(self, x: int, y: int) -> None:
+        """Moves the cursor (NON-BLOCKING)
+
+        Args:
+            x (int): column
+            y (int): line
+        """
+        self._x = x
+        self._y = y
+
+    def cursor_mode(self, mode: int) -> None:
+        """Shows or hides the cursor (NON-BLOCKING)
+
+        Args:
+            mode (int): CURSOR_OFF, CURSOR_ON or CURSOR_BLINK
+        """
+        self._mode = mode
+
+    def poll(self) -> bool:
+        """Sends a frame when one is due, called from the background loop
+
+        Returns:
+            bool: True when a frame was sent
+        """
+        if time.ticks_diff(time.ticks_ms(), self._t) < self.frame_ms:
+            return False
+        self._t = time.ticks_ms()
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Sends the changed cells and the cursor now
+
+        Returns:
+            bool: True when anything was sent
+        """
+        lcd = self.shadow.lcd
+        if self._dirty:
+            self._lock.acquire()
+            self._out[:] = self._frame
+            self._dirty = False
+            self._lock.release()
+            if self.shadow.update(self._out):
+                self._lcd_x = -1
+
+        sent = False
+        x = self._x
+        y = self._y
+        if x != self._lcd_x or y != self._lcd_y:
+            lcd.move_to(x, y)
+            self._lcd_x = x
+            self._lcd_y = y
+            sent = True
+
+        mode = self._mode
+        if mode != self._lcd_mode:
+            if mode == CURSOR_BLINK:
+                lcd.blink_cursor_on()
+            elif mode == CURSOR_ON:
+                lcd.show_cursor()
+            else:
+                lcd.hide_cursor()
+            self._lcd_mode = mode
+            sent = True
+
+        if sent:
+            self.frames += 1
+        return sent
@@ -0,0 +1,145 @@
+# Streaming filters for the tension reading
+#
+# All filters work on integers (grams) with fixed point state and buffers
+# allocated in __init__, so update() never allocates and is safe to call
+# from the HX711 IRQ handler.
+
+from array import array
+
+FRAC_BITS = 4 # fractional bits of the EMA and Kalman state
+
+class passthrough:
+
+    def __init__(self) -> None:
+        pass
+
+    def reset(self, value: int = 0) -> None:
+        """Restarts the filter as if it had settled at value
+
+        Args:
+            value (int, optional): Defaults to 0.
+        """
+        pass
+
+    def update(self, value: int) -> int:
+        """Adds a sample and returns the filtered value
+
+        Args:
+            value (int):
+
+        Returns:
+            int:
+        """
+        return value
+
+class moving_average(passthrough):
+
+    def __init__(self, size: int = 4) -> None:
+        """Mean of the last size samples
+
+        Args:
+            size (int, optional): window length. Defaults to 4.
+        """
+        self._ring = array('i', [0] * size)
+        self._size = size
+        self._idx = 0
+        self._sum = 0
+
+    def reset(self, value: int = 0) -> None:
+        for i in range(self._size):
+            self._ring[i] = value
+        self._sum = value * self._size
+
+    def update(self, value: int) -> int:
+        i = self._idx
+        self._sum += value - self._ring[i]
+        self._ring[i] = value
+        i += 1
+        self._idx = 0 if i == self._size else i
+        return self._sum // self._size
+
+class moving_median(passthrough):
+
+    def __init__(self, size: int = 5) -> None:
+        """Median of the last size samples
+
+        The window is also kept sorted, so each update is one linear
+        search plus an insertion step instead of a full sort.
+
+        Args:
+            size (int, optional): window length, should be odd. Defaults to 5.
+        """
+        self._ring = array('i', [0] * size)
+        self._sorted = array('i', [0] * size)
+        self._size = size
+        self._idx = 0
+
+    def reset(self, value: int = 0) -> None:
+        for i in range(self._size):
+            self._ring[i] = value
+            self._sorted[i] = value
+
+    def update(self, value: int) -> int:
+        ring = self._ring
+        s = self._sorted
+        last = self._size - 1
+        i = self._idx
+        old = ring[i]
+        ring[i] = value
+        self._idx = 0 if i == last else i + 1
+
+        # replace the oldest sample in the sorted window and move it into place
+        j = 0
+        while s[j] != old: j += 1
+        s[j] = value
+        while j > 0 and s[j - 1] > value:
+            s[j] = s[j - 1]
+            j -= 1
+        while j < last and s[j + 1] < value:
+            s[j] = s[j + 1]
+            j += 1
+        s[j] = value
+        return s[self._size >> 1]
+
+class ema(passthrough):
+
+    def __init__(self, shift: int = 2) -> None:
+        """Exponential moving average with alpha = 1 / 2**shift
+
+        Args:
+            shift (int, optional): Defaults to 2.
+        """
+        self._shift = shift
+        self._acc = 0
+
+    def reset(self, value: int = 0) -> None:
+        self._acc = value << FRAC_BITS
+
+    def update(self, value: int) -> int:
+        self._acc += ((value << FRAC_BITS) - self._acc) >> self._shift
+        return (self._acc + (1 << (FRAC_BITS - 1))) >> FRAC_BITS
+
+class kalman(passthrough):
+
+    def __init__(self, q: int = 4, r: int = 64) -> None:
+        """One dimensional Kalman filter with a constant value model
+
+        Args:
+            q (int, optional): process noise variance (g^2). Defaults to 4.
+            r (int, optional): measurement noise variance (g^2). Defaults to 64.
+        """
+        self._q = q
+        self._r = r
+        self._x = 0
+        self._p = r
+
+    def reset(self, value: int = 0) -> None:
+        self._x = value << FRAC_BITS
+        self._p = self._r
+
+    def update(self, value: int) -> int:
+        p = self._p + self._q
+        k = (p << 8) // (p + self._r) # gain, 8 fractional bits
+        self._x += (k * ((value << FRAC_BITS) - self._x)) >> 8
+        self._p = ((256 - k) * p) >> 8
+        return (self._x + (1 << (FRAC_BITS - 1))) >> FRAC_BITS
@@ -0,0 +1,139 @@
+# Single-register GPIO port writes
+#
+# The RP2040 SIO changes any set of outputs with one 32-bit write to
+# GPIO_OUT_XOR, so a group of pins, e.g. the four TB6600 inputs, switches
+# together instead of one Pin.value() call at a time. A port is a list of
+# GPIO numbers; the levels of a row, e.g. one phase of a step table, are
+# turned into a bit pattern once with table(), and write() and
+# write_seq() then only do the masked register writes.
+#
+# write_seq() holds every row but the last for at least hold_us before the
+# next write, timed by busy-waiting on the free-running 1 MHz TIMERAWL
+# counter: back to back, a row would last only tens of nanoseconds, and the
+# TB6600 needs a PUL pulse of at least 2.5 us and time for DIR to settle.
+#
+# Registers are reached through a backend indexed by address like
+# machine.mem32, the default. On MicroPython the default backend writes
+# sequences with a viper loop; any other backend, e.g. a fake register
+# file under CPython, gets the same writes in plain Python.
+
+import sys
+from array import array
+from machine import mem32
+
+SIO_BASE = 0xd0000000
+GPIO_IN = SIO_BASE + 0x004
+GPIO_OUT = SIO_BASE + 0x010
+GPIO_OUT_SET = SIO_BASE + 0x014
+GPIO_OUT_CLR = SIO_BASE + 0x018
+GPIO_OUT_XOR = SIO_BASE + 0x01c
+TIMER_RAWL = 0x40054028     # TIMER TIMERAWL, microseconds since boot
+
+if sys.implementation.name == 'micropython':
+    import micropython
+
+    @micropython.viper
+    def _write_seq(table: ptr32, n: int, mask: int, hold: int):
+        out = ptr32(0xd0000010)    # GPIO_OUT, GPIO_OUT_XOR is three words up
+        timer = ptr32(0x40054028)  # TIMERAWL
+        t = 0
+        i = 0
+        while i < n:
+            if i:
+                while timer[0] - t < hold:
+                    pass
+            out[3] = (out[0] ^ table[i]) & mask
+            t = timer[0]
+            i += 1
+else:
+    _write_seq = None
+
+class port:
+
+    def __init__(self, pins: list, regs=None, hold_us: int = 0) -> None:
+        """Create a port
+
+        Args:
+            pins (list): GPIO numbers, already set up as outputs
+            regs (optional): register backend indexed by address like machine.mem32.
+                Defaults to machine.mem32.
+            hold_us (int, optional): shortest time a row of write_seq() is held
+                before the next one. Defaults to 0.
+        """
+        self.pins = pins
+        self.hold_us: int = hold_us
+        self.mask: int = 0
+        for gpio in pins:
+            self.mask |= 1 << gpio
+        self._regs = mem32 if regs is None else regs
+        self._fast = regs is None and _write_seq is not None
+
+    def bit(self, idx: int) -> int:
+        """Bit of one pin
+
+        Args:
+            idx (int): index in pins
+
+        Returns:
+            int: bit pattern with only that pin set
+        """
+        return 1 << self.pins[idx]
+
+    def bits(self, levels: list) -> int:
+        """Bit pattern of a row of levels
+
+        Args:
+            levels (list): 0 or 1 per pin, in the order of pins
+
+        Returns:
+            int: bit pattern for write()
+        """
+        bits = 0
+        for i in range(len(self.pins)):
+            if levels[i]:
+                bits |= 1 << self.pins[i]
+        return bits
+
+    def table(self, rows: list) -> array:
+        """Bit patterns of a table of rows, e.g. the phases of a step
+
+        Args:
+            rows (list): rows of levels, see bits()
+
+        Returns:
+            array: bit patterns for write_seq()
+        """
+        return array('I', [self.bits(row) for row in rows])
+
+    def write(self, bits: int, mask: int = -1) -> None:
+        """Sets the pins in one register write
+
+        Args:
+            bits (int): bit pattern, see bits() and bit()
+            mask (int, optional): only these pins are changed. Defaults to -1, all.
+        """
+        regs = self._regs
+        regs[GPIO_OUT_XOR] = (regs[GPIO_OUT] ^ bits) & self.mask & mask
+
+    def write_seq(self, table: array) -> None:
+        """Writes the bit patterns of a table one after the other, each held
+        for at least hold_us
+
+        Args:
+            table (array): value returned by table()
+        """
+        if self._fast:
+            _write_seq(table, len(table), self.mask, self.hold_us)
+            return
+
+        regs = self._regs
+        mask = self.mask
+        hold = self.hold_us
+        t = 0
+        for i in range(len(table)):
+            if i and hold:
+                while (regs[TIMER_RAWL] - t) & 0xffffffff < hold:
+                    pass
+            regs[GPIO_OUT_XOR] = (regs[GPIO_OUT] ^ table[i]) & mask
+            if hold:
+                t = regs[TIMER_RAWL]
@@ -0,0 +1,112 @@
+# Load cell channel health monitor
+#
+# The HX711 IRQ handler reports every drain of the RX FIFO with its
+# ticks_us time. From that the monitor keeps the effective sample rate
+# over the last second and the jitter of the sample interval. check(),
+# called from the monitoring loop, tells whether samples are still coming
+# fast enough, so a dead or flaky sensor stops the motor instead of
+# leaving the tension reading frozen. A gap without samples is a fault
+# only while it lasts: it clears with the next sample, and the rate
+# window starts again after it, so a short stall (a flash write, a GC
+# pause) does not hold the fault for the rest of the second. Once
+# slow_gaps long gaps come in a row the sensor is slow rather than
+# stalled, and they count in the rate again, so the rate drops below the
+# minimum and the fault holds. Nothing is allocated.
+
+import time
+
+class sample_health:
+
+    def __init__(
+        self,
+        sps: int,
+        min_pct: int = 80,
+        timeout_periods: int = 4,
+        slow_gaps: int = 3
+    ) -> None:
+        """Create a health monitor
+
+        Args:
+            sps (int): nominal samples per second of the HX711
+            min_pct (int, optional): lowest healthy rate, in % of sps. Defaults to 80.
+            timeout_periods (int, optional): sample periods without a sample before
+                the channel counts as stopped. Defaults to 4.
+            slow_gaps (int, optional): gaps longer than that in a row before they
+                count in the rate. Defaults to 3.
+        """
+        self.sps: int = sps
+        self.sps_min: int = sps * min_pct // 100
+        self._period = 1000000 // sps
+        self._timeout = self._period * timeout_periods
+        self._slow_gaps = slow_gaps
+        self.restart(time.ticks_us())
+
+    def restart(self, now: int) -> None:
+        """Clears the measurements, e.g. after the HX711 was powered up
+
+        Args:
+            now (int): ticks_us()
+        """
+        self.rate: int = -1         # samples per second, -1 until measured
+        self.jitter: int = 0        # us, average deviation from the nominal period
+        self.jitter_max: int = 0    # us, largest deviation in the last second
+        self.saturated: int = 0     # samples at the HX711 min or max value
+        self.healthy: bool = True
+        self.stalled: bool = False  # no sample for timeout_periods
+        self._last = now
+        self._long = 0              # long gaps in a row
+        self._win_start = now
+        self._win_count = 0
+        self._win_jitter = 0
+
+    def update(self, now: int, count: int) -> None:
+        """Reports samples taken out of the FIFO
+
+        Args:
+            now (int): ticks_us() of the drain
+            count (int): number of samples drained
+        """
+        if count <= 0:
+            return
+
+        gap = time.ticks_diff(now, self._last)
+        dt = gap // count
+        self._last = now
+        self.stalled = False
+        if gap <= self._timeout:
+            self._long = 0
+        else:
+            self._long += 1
+            if self._long < self._slow_gaps:
+                # the stall was a fault while it lasted, keep it out of the rate
+                self._win_start = now
+                self._win_count = 0
+                self._win_jitter = 0
+                return
+        dev = abs(dt - self._period)
+        self.jitter += (dev - self.jitter) >> 3
+        if dev > self._win_jitter:
+            self._win_jitter = dev
+
+        self._win_count += count
+        elapsed = time.ticks_diff(now, self._win_start)
+        if elapsed >= 1000000:
+            self.rate = self._win_count * 1000000 // elapsed
+            self.jitter_max = self._win_jitter
+            self._win_start = now
+            self._win_count = 0
+            self._win_jitter = 0
+
+    def check(self, now: int) -> bool:
+        """Whether the channel is healthy
+
+        Args:
+            now (int): ticks_us()
+
+        Returns:
+            bool: False while no sample came for timeout_periods, or when the
+                rate of the last second is below the minimum
+        """
+        self.stalled = time.ticks_diff(now, self._last) > self._timeout
+        self.healthy = not self.stalled and (self.rate < 0 or self.rate >= self.sps_min)
+        return self.healthy
@@ -24,7 +24,7 @@
 
 import _thread
 import time
-from machine import Pin
+from machine import Pin, mem32
 from micropython import const
 from rp2 import PIO, StateMachine, asm_pio
 
@@ -109,6 +109,26 @@ class hx711:
             while sm.rx_fifo() == 0: pass
             return sm.get()
 
+        @classmethod
+        def sm_rx_stalled(cls, sm_index: int) -> bool:
+            """Whether the StateMachine stalled on a full RX FIFO since the last call
+
+            Args:
+                sm_index (int): global state machine index
+
+            Returns:
+                bool:
+
+            Reads and clears the state machine's FDEBUG RXSTALL flag
+            https://datasheets.raspberrypi.com/rp2040/rp2040-datasheet.pdf#page=375
+            """
+            addr = (0x50300000 if sm_index >> 2 else 0x50200000) + 0x008
+            bit = 1 << (sm_index & 3)
+            if mem32[addr] & bit:
+                mem32[addr] = bit
+                return True
+            return False
+
     class rate:
         rate_10: int = const(0)
         rate_80: int = const(1)
@@ -139,7 +159,7 @@ class hx711:
         def __init__(self) -> None:
             super().__init__()
 
-        def init(self, hx: hx711) -> None:
+        def init(self, hx: "hx711") -> None:
             hx._sm = StateMachine(
                 hx._sm_index,
                 self.program,
@@ -183,6 +203,8 @@ class hx711:
 
             out(x, 2)
 
+            irq(noblock, rel(0)) # value pushed, see hx711.set_irq()
+
             jmp(not_x, "wrap_target").side(0)
 
             mov(y, x)
@@ -233,6 +255,7 @@ class hx711:
         self._sm: StateMachine
         self._sm_index: int = sm_index
         self._prog: __class__._pio_prog = prog
+        self.overruns: int = 0
 
         prog.init(self)
 
@@ -378,6 +401,49 @@ class hx711:
         self._mut.release()
         return self.get_twos_comp(val) if val else None
 
+    def get_values_into(self, buf, idx: int) -> int:
+        """Moves every value in the RX FIFO into a ring buffer (NON-BLOCKING)
+
+        Values are written from buf[idx] onwards, wrapping at the end of
+        buf, and converted to two's complement in place. The lock is taken
+        once for the whole drain and nothing is allocated. overruns is
+        incremented if the RX FIFO filled up since the previous drain.
+
+        Args:
+            buf (array): preallocated array('i') used as a ring buffer
+            idx (int): index of the next free slot in buf
+
+        Returns:
+            int: number of values written
+        """
+        size = len(buf)
+        count = 0
+        self._mut.acquire()
+        sm = self._sm
+        if __class__._util.sm_rx_stalled(self._sm_index):
+            self.overruns += 1
+        while sm.rx_fifo():
+            raw = sm.get()
+            buf[idx] = -(raw & 0x800000) + (raw & 0x7fffff)
+            idx += 1
+            if idx == size: idx = 0
+            count += 1
+        self._mut.release()
+        return count
+
+    def set_irq(self, handler, hard: bool = False) -> None:
+        """Calls handler each time the PIO program pushes a value
+
+        The handler should empty the RX FIFO (see get_values_into()). Once
+        the FIFO is full the state machine stalls and no further IRQs are
+        raised, so drain it once after registering the handler.
+
+        Args:
+            handler: callable taking the StateMachine, or None to disable
+            hard (bool, optional): run as a hard IRQ. Defaults to False.
+        """
+        self._sm.irq(handler, hard=hard)
+
     def set_power(self, pwr: int) -> None:
         """Changes the power state of the HX711 and starts/stops the PIO program
 
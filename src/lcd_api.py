@@ -150,8 +150,32 @@ class LcdApi:
     def putstr(self, string):
         # Write the indicated string to the LCD at the current cursor
         # position and advances the cursor position appropriately.
-        for char in string:
-            self.putchar(char)
+        #
+        # The LCD advances its address by itself after each character
+        # (LCD_ENTRY_INC), so a run of characters within a line is sent as
+        # data only, and the address is only set again at a line wrap or a
+        # newline. The cursor ends up where putchar() would leave it.
+        i = 0
+        n = len(string)
+        while i < n:
+            if string[i] == '\n':
+                self.putchar('\n')
+                i += 1
+                continue
+            j = string.find('\n', i)
+            if j < 0:
+                j = n
+            j = max(i + 1, min(j, i + self.num_columns - self.cursor_x))
+            self.hal_write_chars(string[i:j])
+            self.cursor_x += j - i
+            i = j
+            if self.cursor_x >= self.num_columns:
+                self.cursor_x = 0
+                self.cursor_y += 1
+                self.implied_newline = True
+                if self.cursor_y >= self.num_lines:
+                    self.cursor_y = 0
+                self.move_to(self.cursor_x, self.cursor_y)
 
     def custom_char(self, location, charmap):
         # Write a character to one of the 8 CGRAM locations, available
@@ -184,6 +208,13 @@ class LcdApi:
         # It is expected that a derived HAL class will implement this function.
         raise NotImplementedError
 
+    def hal_write_chars(self, string):
+        # Write a run of characters to the LCD, which advances its address
+        # after each one.
+        # A derived HAL class may implement this function to send them faster.
+        for char in string:
+            self.hal_write_data(ord(char))
+
     def hal_sleep_us(self, usecs):
         # Sleep for some time (given in microseconds)
         time.sleep_us(usecs)
@@ -0,0 +1,132 @@
+# Online string model
+#
+# Learns the string from the normal pulls instead of calibration pulls.
+# While the slide pulls, every HX711 sample above the slack gives the
+# tension change over the steps since the previous one, and a recursive
+# least-squares estimate with forgetting turns these into the stiffness
+# in grams per step, following the last part of the current pull. After
+# the tension stop, the tension the string settles at above the stop
+# gives the stop lag in steps, the motion that happens between the
+# tension crossing the stop and the slide standing still. Together they
+# give the fine-tune step count for a tension change and the grams to
+# stop early by. Only a few float operations per sample, no allocation.
+
+class rls:
+
+    def __init__(self, theta: float = 0.0, p: float = 1.0, lam: float = 0.98, p_max: float = 1.0) -> None:
+        """Create a recursive least-squares estimate of y = theta * x
+
+        Args:
+            theta (float, optional): initial estimate. Defaults to 0.0.
+            p (float, optional): initial covariance, large for little trust in theta.
+                Defaults to 1.0.
+            lam (float, optional): forgetting factor per update, 1 for none.
+                Defaults to 0.98.
+            p_max (float, optional): covariance limit, keeps the estimate from
+                winding up while the data does not change. Defaults to 1.0.
+        """
+        self.theta: float = theta
+        self.p: float = p
+        self.lam: float = lam
+        self.p_max: float = p_max
+        self.n: int = 0         # updates so far
+
+    def update(self, x: float, y: float) -> float:
+        """Adds an observation
+
+        Args:
+            x (float): regressor
+            y (float): observed value
+
+        Returns:
+            float: new estimate
+        """
+        px = self.p * x
+        gain = px / (self.lam + x * px)
+        self.theta += gain * (y - self.theta * x)
+        self.p = min(self.p_max, (self.p - gain * px) / self.lam)
+        self.n += 1
+        return self.theta
+
+class string_model:
+
+    def __init__(self, min_steps: int = 4, lam_k: float = 0.95, lam_lag: float = 0.7) -> None:
+        """Create a string model
+
+        Args:
+            min_steps (int, optional): fewest steps between two samples used for
+                the stiffness, fewer leave the noise larger than the change.
+                Defaults to 4.
+            lam_k (float, optional): forgetting factor per sample of the stiffness.
+                Defaults to 0.95.
+            lam_lag (float, optional): forgetting factor per pull of the stop lag.
+                Defaults to 0.7.
+        """
+        self._min_steps = min_steps
+        self._k = rls(0.0, 1.0, lam_k)
+        self._lag = rls(0.0, 100.0, lam_lag, 100.0)
+        self._steps = -1
+        self._g = 0
+
+    def stiffness(self) -> float:
+        """Stiffness of the string
+
+        Returns:
+            float: grams per step, 0 until learned
+        """
+        return self._k.theta if self._k.n else 0.0
+
+    def begin(self) -> None:
+        """Starts the samples of a new pull
+        """
+        self._steps = -1
+
+    def sample(self, steps: int, g: int) -> None:
+        """Reports a tension sample while pulling the string
+
+        Args:
+            steps (int): steps since the start of the pull
+            g (int): tension in grams, above the slack
+        """
+        if self._steps >= 0:
+            ds = steps - self._steps
+            if ds < self._min_steps:
+                return
+            self._k.update(ds, g - self._g)
+        self._steps = steps
+        self._g = g
+
+    def stop(self, stop_g: int, g: int) -> None:
+        """Reports where the tension settled after a tension stop
+
+        Args:
+            stop_g (int): tension stop of the pull in grams
+            g (int): tension after the slide stopped
+        """
+        k = self.stiffness()
+        if k > 0:
+            self._lag.update(k, g - stop_g)
+
+    def steps(self, g: int) -> int:
+        """Steps for a tension change
+
+        Args:
+            g (int): grams
+
+        Returns:
+            int: 0 until the stiffness is learned
+        """
+        k = self.stiffness()
+        if k <= 0:
+            return 0
+        return int(g / k + 0.5)
+
+    def offset(self) -> int:
+        """Grams the tension rises after crossing a tension stop
+
+        Returns:
+            int: 0 until learned
+        """
+        if self._lag.n == 0:
+            return 0
+        return int(self.stiffness() * self._lag.theta)
@@ -0,0 +1,147 @@
+# Acceleration-limited motion profiles
+#
+# A ramp is the speed-up part of a move from a start rate the motor can
+# pull in directly up to the cruise rate, cut into short segments of
+# constant step rate. It is computed once per cruise rate and reused for
+# every move, mirrored for the slow-down. A move that is too short to
+# reach the cruise rate uses part of the ramp on each side (triangular
+# profile), so no floating point work is done per move.
+#
+# An approach schedules the speed of a move that ends at a tension
+# target instead of a step count. Inside a band below the target the
+# step period follows the remaining tension error, so with the tension
+# rising about linearly with the steps the slide slows down at a constant
+# rate and reaches the target at the start rate. The periods are tabled
+# once, looking one up is integer work for the HX711 sample handler.
+
+import math
+from array import array
+
+PROFILE_CONSTANT = 0
+PROFILE_TRAPEZOID = 1
+PROFILE_SCURVE = 2
+
+class ramp:
+
+    def __init__(
+        self,
+        period: int,
+        kind: int = PROFILE_SCURVE,
+        start_hz: int = 1000,
+        accel: int = 40000,
+        jerk: int = 2000000,
+        seg_us: int = 2000,
+        overhead: int = 10
+    ) -> None:
+        """Create a ramp
+
+        Args:
+            period (int): cruise step period in us
+            kind (int, optional): PROFILE_CONSTANT, PROFILE_TRAPEZOID or PROFILE_SCURVE.
+                Defaults to PROFILE_SCURVE.
+            start_hz (int, optional): step rate the move starts and ends at. Defaults to 1000.
+            accel (int, optional): acceleration limit in steps/s^2. Defaults to 40000.
+            jerk (int, optional): jerk limit in steps/s^3, S-curve only. Defaults to 2000000.
+            seg_us (int, optional): length of one segment in us. Defaults to 2000.
+            overhead (int, optional): smallest period the pulse generator can do, the
+                periods are even steps above it. Defaults to 10.
+        """
+        self.period: int = period
+        v1 = 1000000 / period
+        v0 = min(start_hz, v1)
+        dv = v1 - v0
+        t = 0.0
+        if kind == PROFILE_TRAPEZOID and dv > 0:
+            t = dv / accel
+        elif kind == PROFILE_SCURVE and dv > 0:
+            # smoothstep speed curve: peak accel 1.5 dv/t, peak jerk 6 dv/t^2
+            t = max(1.5 * dv / accel, math.sqrt(6 * dv / jerk))
+
+        n = int(t * 1000000 / seg_us + 0.5)
+        self.n: int = n
+        self.steps = array('i', [0] * n)
+        self.periods = array('i', [0] * n)
+        self.cum = array('i', [0] * (n + 1))   # steps in the first k segments
+        for i in range(n):
+            u = (i + 0.5) / n
+            if kind == PROFILE_SCURVE:
+                u = u * u * (3 - 2 * u)
+            v = v0 + dv * u
+            p = max(overhead, int(1000000 / v))
+            p = p - ((p - overhead) & 1)
+            self.periods[i] = p
+            self.steps[i] = max(1, int(seg_us / p + 0.5))
+            self.cum[i + 1] = self.cum[i] + self.steps[i]
+
+    def plan(self, steps: int) -> int:
+        """Number of ramp segments used on each side of a move
+
+        Args:
+            steps (int): steps of the move
+
+        Returns:
+            int: k, the move runs segments 0..k-1, a cruise part and k-1..0
+        """
+        k = self.n
+        while k > 0 and 2 * self.cum[k] > steps:
+            k -= 1
+        return k
+
+    def cruise_period(self, k: int) -> int:
+        """Period of the cruise part of a move planned with k segments
+
+        Args:
+            k (int): value returned by plan()
+
+        Returns:
+            int: us
+        """
+        if k < self.n:
+            return self.periods[k]
+        return self.period
+
+class approach:
+
+    def __init__(
+        self,
+        period: int,
+        band: int,
+        end_hz: int = 1000,
+        n: int = 16,
+        overhead: int = 10
+    ) -> None:
+        """Create an approach schedule
+
+        Args:
+            period (int): step period outside the band in us
+            band (int): tension error in grams below which the slide slows down
+            end_hz (int, optional): step rate at the target. Defaults to 1000.
+            n (int, optional): number of steps of the schedule. Defaults to 16.
+            overhead (int, optional): smallest period the pulse generator can do, the
+                periods are even steps above it. Defaults to 10.
+        """
+        self.band: int = band
+        self.n: int = n
+        v1 = 1000000 / period
+        v0 = min(end_hz, v1)
+        self.periods = array('i', [0] * n)
+        for i in range(n):
+            # constant deceleration: speed^2 proportional to the error
+            v = math.sqrt(v0 * v0 + (v1 * v1 - v0 * v0) * i / n)
+            p = max(overhead, int(1000000 / v))
+            self.periods[i] = p - ((p - overhead) & 1)
+
+    def period(self, err: int) -> int:
+        """Step period for a tension error
+
+        Args:
+            err (int): target minus tension in grams
+
+        Returns:
+            int: us, 0 outside the band
+        """
+        if err >= self.band:
+            return 0
+        if err <= 0:
+            return self.periods[0]
+        return self.periods[err * self.n // self.band]
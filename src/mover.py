@@ -0,0 +1,204 @@
+# Non-blocking moves
+#
+# start() sets DIR, hands the move to the step state machine
+# (src/stepper.py) and returns at once with a handle. The move then runs
+# in the background: the PIO makes the pulses and stops by itself at the
+# limit switch in the direction of travel, and the HX711 sample handler
+# passes every reading to tension(), which freezes the state machine as
+# soon as the tension stop of the move is reached. The caller polls the
+# handle between its own work (or waits for it), so whatever it does in
+# the meantime, e.g. LCD updates, adds no latency to these stops. Stop conditions that only need to be seen
+# at poll rate, such as buttons, are passed to start() as functions.
+# With an approach schedule (src/motion.py) tension() also slows the
+# move down as the tension nears the stop.
+
+import time
+from machine import Pin
+
+RUNNING = 0
+DONE = 1        # all steps done
+TENSION = 2     # stop_g reached
+LIMIT = 3       # limit switch in the direction of travel
+CANCELLED = 4   # cancel(), another start(), or a check returned a reason
+
+class move:
+
+    def __init__(self, ctl, direction: int, steps: int, stop_g: int, checks: tuple) -> None:
+        """Handle of a move, returned by mover.start()
+
+        Args:
+            ctl (mover): controller running the move
+            direction (int): 0 = tension up, 1 = tension down
+            steps (int): steps asked for
+            stop_g (int): tension stop in grams, 0 for none
+            checks (tuple): functions called at every poll, a truthy return value
+                cancels the move and becomes its reason
+        """
+        self._ctl = ctl
+        self.direction: int = direction
+        self.target: int = steps
+        self.stop_g: int = stop_g
+        self.checks: tuple = checks
+        self.end: int = RUNNING
+        self.reason = None      # value returned by the check or given to cancel()
+        self.steps: int = 0     # steps done, exact once the move has ended
+        self.t0: int = time.ticks_us()
+
+    def poll(self) -> bool:
+        """Updates steps, runs the checks and ends the move when it stopped
+
+        Returns:
+            bool: True once the move has ended, see end
+        """
+        if self.end != RUNNING:
+            return True
+        return self._ctl._poll(self)
+
+    def cancel(self, reason=None) -> int:
+        """Stops the move at once
+
+        Args:
+            reason (optional): kept in reason. Defaults to None.
+
+        Returns:
+            int: steps done
+        """
+        if self.end == RUNNING:
+            self._ctl._finish(self, CANCELLED, reason)
+        return self.steps
+
+    def wait(self, poll_us: int = 500) -> int:
+        """Blocks until the move has ended
+
+        Args:
+            poll_us (int, optional): polling interval. Defaults to 500.
+
+        Returns:
+            int: end
+        """
+        while not self.poll():
+            time.sleep_us(poll_us)
+        return self.end
+
+class mover:
+
+    STEER_US: int = 2000        # us per cruise segment of a move with an approach
+
+    def __init__(self, stepper, dir_a: Pin, dir_b: Pin, limit_up: Pin, limit_down: Pin) -> None:
+        """Create a motion controller
+
+        Args:
+            stepper (src.stepper.pio_stepper): step pulse generator
+            dir_a (Pin): DIR output, high for direction 0
+            dir_b (Pin): DIR output, high for direction 1
+            limit_up (Pin): limit switch that ends direction 0 moves
+            limit_down (Pin): limit switch that ends direction 1 moves
+        """
+        self.stepper = stepper
+        self._dir_a: Pin = dir_a
+        self._dir_b: Pin = dir_b
+        self._limits = (limit_up, limit_down)
+        self._cur: move = None
+        self._stop_g: int = 0
+        self._approach = None
+        self._frozen: bool = False
+        self.last: int = 0      # steps of the last ended move
+
+    def start(
+        self,
+        direction: int,
+        steps: int,
+        delay: float,
+        ramp=None,
+        stop_g: int = 0,
+        checks: tuple = (),
+        approach=None
+    ) -> move:
+        """Starts a move (NON-BLOCKING), a move still running is cancelled first
+
+        Args:
+            direction (int): 0 = tension up, 1 = tension down
+            steps (int): number of steps
+            delay (float): seconds per step, see pio_stepper.move()
+            ramp (src.motion.ramp, optional): speed profile. Defaults to None.
+            stop_g (int, optional): stop as soon as the tension exceeds this, 0 for
+                none. Defaults to 0.
+            checks (tuple, optional): functions called at every poll, a truthy
+                return value cancels the move. Defaults to ().
+            approach (src.motion.approach, optional): slows the move down as the
+                tension nears stop_g. Defaults to None.
+
+        Returns:
+            move: handle of the move
+        """
+        self.stop()
+        if direction == 0:
+            self._dir_a.value(1)
+            self._dir_b.value(0)
+        else:
+            self._dir_a.value(0)
+            self._dir_b.value(1)
+
+        h = move(self, direction, steps, stop_g, checks)
+        self._frozen = False
+        self._stop_g = stop_g
+        self._approach = approach if stop_g else None
+        self._cur = h
+        steer_us = self.STEER_US if self._approach is not None else 0
+        self.stepper.move(steps, delay, self._limits[direction], ramp, steer_us)
+        h.t0 = time.ticks_us()
+        return h
+
+    def tension(self, g: int) -> None:
+        """Reports a tension reading, called from the HX711 IRQ handler
+
+        Freezes the state machine when the running move has a tension stop
+        and g exceeds it. The handle completes the stop at its next poll.
+        Below the stop, a move with an approach is slowed down by the error.
+
+        Args:
+            g (int): tension in grams
+        """
+        if self._stop_g and not self._frozen:
+            if g > self._stop_g:
+                self._frozen = True
+                self.stepper.freeze()
+            elif self._approach is not None:
+                self.stepper.slow_down(self._approach.period(self._stop_g - g))
+
+    def stop(self) -> int:
+        """Cancels the running move, if any
+
+        Returns:
+            int: steps done by the last move
+        """
+        if self._cur is not None:
+            self._cur.cancel()
+        return self.last
+
+    def _poll(self, h: move) -> bool:
+        if self._frozen:
+            return self._finish(h, TENSION, None)
+
+        for check in h.checks:
+            reason = check()
+            if reason:
+                return self._finish(h, CANCELLED, reason)
+
+        stepper = self.stepper
+        if not stepper.moving():
+            return self._finish(h, LIMIT if stepper.hit else DONE, None)
+
+        h.steps = stepper.steps_done(time.ticks_diff(time.ticks_us(), h.t0))
+        return False
+
+    def _finish(self, h: move, end: int, reason) -> bool:
+        self._stop_g = 0
+        self._approach = None
+        h.steps = self.stepper.stop()
+        h.end = end
+        h.reason = reason
+        self._cur = None
+        self._frozen = False
+        self.last = h.steps
+        return True
@@ -17,10 +17,18 @@ SHIFT_DATA      = 4  # P4-P7
 class I2cLcd(LcdApi):
     
     #Implements a HD44780 character LCD connected via PCF8574 on I2C
+    #Each byte is sent as its four expander port writes (two nibbles, each
+    #with E high then low) in one writeto() from a preallocated buffer, and a
+    #run of characters in one writeto() for the whole run
+
+    BURST = 20      # characters per writeto() in hal_write_chars()
 
     def __init__(self, i2c, i2c_addr, num_lines, num_columns):
         self.i2c = i2c
         self.i2c_addr = i2c_addr
+        self._buf = bytearray(4 * self.BURST)
+        self._mv = memoryview(self._buf)
+        self._one = self._mv[:4]
         self.i2c.writeto(self.i2c_addr, bytes([0]))
         utime.sleep_ms(20)   # Allow LCD time to powerup
         # Send reset 3 times
@@ -40,49 +48,60 @@ class I2cLcd(LcdApi):
         self.hal_write_command(cmd)
         gc.collect()
 
+    def _encode(self, pos, value, rs):
+        # Puts the four port writes of one byte at buf[pos:pos + 4]
+        buf = self._buf
+        byte = (rs |
+                (self.backlight << SHIFT_BACKLIGHT) |
+                (((value >> 4) & 0x0f) << SHIFT_DATA))
+        buf[pos] = byte | MASK_E
+        buf[pos + 1] = byte
+        byte = (rs |
+                (self.backlight << SHIFT_BACKLIGHT) |
+                ((value & 0x0f) << SHIFT_DATA))
+        buf[pos + 2] = byte | MASK_E
+        buf[pos + 3] = byte
+
     def hal_write_init_nibble(self, nibble):
         # Writes an initialization nibble to the LCD.
         # This particular function is only used during initialization.
         byte = ((nibble >> 4) & 0x0f) << SHIFT_DATA
-        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytes([byte]))
-        gc.collect()
+        self._buf[0] = byte | MASK_E
+        self._buf[1] = byte
+        self.i2c.writeto(self.i2c_addr, self._mv[:2])
         
     def hal_backlight_on(self):
         # Allows the hal layer to turn the backlight on
-        self.i2c.writeto(self.i2c_addr, bytes([1 << SHIFT_BACKLIGHT]))
-        gc.collect()
+        self._buf[0] = 1 << SHIFT_BACKLIGHT
+        self.i2c.writeto(self.i2c_addr, self._mv[:1])
         
     def hal_backlight_off(self):
         #Allows the hal layer to turn the backlight off
-        self.i2c.writeto(self.i2c_addr, bytes([0]))
-        gc.collect()
+        self._buf[0] = 0
+        self.i2c.writeto(self.i2c_addr, self._mv[:1])
         
     def hal_write_command(self, cmd):
         # Write a command to the LCD. Data is latched on the falling edge of E.
-        byte = ((self.backlight << SHIFT_BACKLIGHT) |
-                (((cmd >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytes([byte]))
-        byte = ((self.backlight << SHIFT_BACKLIGHT) |
-                ((cmd & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytes([byte]))
+        self._encode(0, cmd, 0)
+        self.i2c.writeto(self.i2c_addr, self._one)
         if cmd <= 3:
             # The home and clear commands require a worst case delay of 4.1 msec
             utime.sleep_ms(5)
-        gc.collect()
 
     def hal_write_data(self, data):
         # Write data to the LCD. Data is latched on the falling edge of E.
-        byte = (MASK_RS |
-                (self.backlight << SHIFT_BACKLIGHT) |
-                (((data >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytes([byte]))
-        byte = (MASK_RS |
-                (self.backlight << SHIFT_BACKLIGHT) |
-                ((data & 0x0f) << SHIFT_DATA))      
-        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytes([byte]))
-        gc.collect()
+        self._encode(0, data, MASK_RS)
+        self.i2c.writeto(self.i2c_addr, self._one)
+
+    def hal_write_chars(self, string):
+        # Write a run of characters to the LCD, BURST at a time. The LCD
+        # advances its address after each one.
+        n = 0
+        for char in string:
+            self._encode(n, ord(char), MASK_RS)
+            n += 4
+            if n == len(self._buf):
+                self.i2c.writeto(self.i2c_addr, self._buf)
+                n = 0
+        if n:
+            self.i2c.writeto(self.i2c_addr, self._mv[:n])
@@ -0,0 +1,151 @@
+# Hot-path profiler
+#
+# Named counters, each with the number of calls and the min/avg/max time
+# in ticks_us, kept in arrays allocated up front. Timing a call does not
+# allocate when wrap() is given the number of arguments, so the wrapper
+# takes them one by one instead of packing them into a tuple; without it
+# every timed call allocates its argument tuple, which adds to its time
+# and to the GC load. Functions are timed by swapping in wrap()ped versions while
+# profiling is on, so they cost nothing when it is off; loops time
+# themselves with start()/stop(), which return at once when it is off.
+
+import time
+from array import array
+
+_LIMIT = 0x3fffffff     # keeps the totals MicroPython small ints
+
+class profiler:
+
+    def __init__(self, names: list) -> None:
+        """Create a profiler
+
+        Args:
+            names (list): counter names, a counter is addressed by its index
+        """
+        self.names = names
+        n = len(names)
+        self.count = array('i', [0] * n)
+        self.total = array('i', [0] * n)
+        self.min = array('i', [0] * n)
+        self.max = array('i', [0] * n)
+        self.on: bool = False
+
+    def reset(self) -> None:
+        """Clears all counters
+        """
+        for i in range(len(self.names)):
+            self.count[i] = 0
+            self.total[i] = 0
+            self.min[i] = 0
+            self.max[i] = 0
+
+    def start(self) -> int:
+        """Start time for stop()
+
+        Returns:
+            int: ticks_us(), or -1 when profiling is off
+        """
+        if self.on:
+            return time.ticks_us()
+        return -1
+
+    def stop(self, idx: int, t0: int) -> None:
+        """Adds the time since t0 to a counter
+
+        Args:
+            idx (int): counter index
+            t0 (int): value returned by start()
+        """
+        if t0 < 0:
+            return
+
+        dt = time.ticks_diff(time.ticks_us(), t0)
+        n = self.count[idx]
+        if n == 0 or dt < self.min[idx]:
+            self.min[idx] = dt
+        if dt > self.max[idx]:
+            self.max[idx] = dt
+        total = self.total[idx] + dt
+        if total > _LIMIT or n >= _LIMIT:
+            # halve both, the average stays the same
+            total = total >> 1
+            n = n >> 1
+        self.total[idx] = total
+        self.count[idx] = n + 1
+
+    def wrap(self, idx: int, func, nargs: int = -1):
+        """Timed version of a function
+
+        Args:
+            idx (int): counter index
+            func: function to time
+            nargs (int, optional): positional arguments func is always called with,
+                0 to 4. Defaults to -1, any, at the cost of a tuple per call.
+
+        Returns:
+            function: calls func and adds its time to the counter
+        """
+        if nargs == 0:
+            def timed():
+                t0 = time.ticks_us()
+                try:
+                    return func()
+                finally:
+                    self.stop(idx, t0)
+        elif nargs == 1:
+            def timed(a):
+                t0 = time.ticks_us()
+                try:
+                    return func(a)
+                finally:
+                    self.stop(idx, t0)
+        elif nargs == 2:
+            def timed(a, b):
+                t0 = time.ticks_us()
+                try:
+                    return func(a, b)
+                finally:
+                    self.stop(idx, t0)
+        elif nargs == 3:
+            def timed(a, b, c):
+                t0 = time.ticks_us()
+                try:
+                    return func(a, b, c)
+                finally:
+                    self.stop(idx, t0)
+        elif nargs == 4:
+            def timed(a, b, c, d):
+                t0 = time.ticks_us()
+                try:
+                    return func(a, b, c, d)
+                finally:
+                    self.stop(idx, t0)
+        else:
+            def timed(*args):
+                t0 = time.ticks_us()
+                try:
+                    return func(*args)
+                finally:
+                    self.stop(idx, t0)
+        return timed
+
+    def stats(self, idx: int) -> tuple:
+        """Counter values
+
+        Args:
+            idx (int): counter index
+
+        Returns:
+            tuple: (count, min us, avg us, max us)
+        """
+        n = self.count[idx]
+        if n == 0:
+            return (0, 0, 0, 0)
+        return (n, self.min[idx], self.total[idx] // n, self.max[idx])
+
+    def dump(self) -> None:
+        """Prints all counters as CSV, e.g. to the USB serial console
+        """
+        print("name,count,min_us,avg_us,max_us")
+        for i in range(len(self.names)):
+            print("%s,%d,%d,%d,%d" % ((self.names[i],) + self.stats(i)))
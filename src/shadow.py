@@ -0,0 +1,71 @@
+# Shadow framebuffer for the character LCD
+#
+# Keeps a copy of what every cell of the display shows. update() compares
+# the next frame, kept by the caller (src/display.py), against the copy
+# and only the cells that changed are sent: each run of changes is one
+# cursor move plus the characters, and runs separated by no more than gap
+# unchanged cells are merged, since resending a cell costs no more than
+# the cursor move it saves. A frame that did not change sends nothing at
+# all, so the periodic tension and timer refreshes are nearly free on the
+# bus.
+#
+# The copy starts as the blank screen the driver leaves after its init.
+# Nothing else may write to the display after that.
+
+class lcd_shadow:
+
+    def __init__(self, lcd, rows: int, cols: int, gap: int = 1) -> None:
+        """Create a shadow framebuffer
+
+        Args:
+            lcd (LcdApi): display, cleared
+            rows (int): lines of the display
+            cols (int): characters per line
+            gap (int, optional): unchanged cells sent again to merge two runs of
+                changes. Defaults to 1.
+        """
+        self.lcd = lcd
+        self.rows: int = rows
+        self.cols: int = cols
+        self.gap: int = gap
+        self._shown = bytearray(b' ' * (rows * cols))
+        self.sent: int = 0      # characters sent
+        self.moves: int = 0     # cursor moves sent
+
+    def update(self, frame: bytearray) -> int:
+        """Shows a whole frame
+
+        Args:
+            frame (bytearray): rows * cols characters, line by line
+
+        Returns:
+            int: cursor moves sent, 0 when the frame was already shown
+        """
+        moves = self.moves
+        shown = self._shown
+        cols = self.cols
+        gap = self.gap
+        for y in range(self.rows):
+            pos = y * cols
+            i = pos
+            line_end = pos + cols
+            while i < line_end:
+                if frame[i] == shown[i]:
+                    i += 1
+                    continue
+
+                end = i + 1
+                j = end
+                while j < line_end and j - end <= gap:
+                    if frame[j] != shown[j]:
+                        end = j + 1
+                    j += 1
+
+                self.lcd.move_to(i - pos, y)
+                self.lcd.putstr(str(frame[i:end], 'ascii'))
+                self.moves += 1
+                self.sent += end - i
+                for k in range(i, end):
+                    shown[k] = frame[k]
+                i = end
+        return self.moves - moves
@@ -0,0 +1,317 @@
+# PIO step pulse generator
+#
+# Drives the PUL input of the TB6600 from a PIO state machine, alongside
+# the HX711 program, so a move runs at an exact pulse rate and the CPU is
+# free for the safety checks while the slide moves. DIR is a plain GPIO
+# set by the caller before the move.
+#
+# A move is a list of segments, each a step count at a constant period.
+# The state machine pulls one segment at a time from the TX FIFO, counts
+# its steps left in x, stops early when the limit switch given as jmp_pin
+# is pressed, and pushes the steps left to the RX FIFO at the end of each
+# segment, raising a PIO IRQ. With a ramp (src/motion.py) the segments
+# speed the slide up and slow it down; without one a move is a single
+# segment. The IRQ handler keeps the FIFO fed, so the caller can do slow
+# work such as LCD updates between its polls of moving(). A move can be
+# stopped at once with stop(), or slowed down with slow_down(), which
+# takes effect from the next segment queued; a steered move cuts its
+# cruise part into short segments for that.
+#
+# jmp_pin can only be set when a state machine is initialised, so each
+# limit switch gets its own state machine running the same program on the
+# same PUL pin, set up the first time a move uses it. A change of
+# direction, e.g. each fine-tune reversal, only switches between them.
+
+import rp2
+from array import array
+from machine import Pin
+from rp2 import PIO, StateMachine, asm_pio
+
+class pio_stepper:
+
+    FREQUENCY: int = 1000000    # 1 us per state machine cycle
+    OVERHEAD: int = 10          # cycles per step outside the delay loops
+    QUEUE: int = 4              # segments in flight: the running one and up to three in the FIFO
+
+    def __init__(self, pul: Pin, sm_index: int = 4) -> None:
+        """Create a step pulse generator
+
+        Args:
+            pul (Pin): GPIO pin connected to PUL+ (PUL- held low)
+            sm_index (int, optional): Global index of the first state machine to use,
+                one more is used for the second limit switch. Defaults to 4, the
+                first state machine of PIO1.
+        """
+        self.pul_pin: Pin = pul
+        self._sm_index: int = sm_index
+        self._sm: StateMachine = None
+        self._limit: Pin = None
+        self._sms = []          # (limit, state machine) set up so far
+        self._q_steps = array('i', [0] * self.QUEUE)
+        self._q_period = array('i', [0] * self.QUEUE)
+        self._q_head = 0
+        self._q_len = 0
+        self._done = 0          # steps of the finished segments
+        self._t_head = 0        # us from move() to the start of the running segment
+        self._ramp = None
+        self._k = 0
+        self._cruise = 0        # cruise steps not queued yet
+        self._cruise_period = 0
+        self._chunk = 0         # us per cruise segment, 0 for a single one
+        self._slow = 0          # lowest period of the segments queued from now on
+        self._seg = 0           # next segment to queue
+        self._segs = 0
+        self.hit: bool = False  # the last move was ended by the limit switch
+        self._busy = False      # the IRQ handler leaves the queue alone while set
+        self._ins_set_low = rp2.asm_pio_encode("set(pins, 0)", 0)
+        self._ins_read_x = rp2.asm_pio_encode("mov(isr, x)", 0)
+        self._ins_push = rp2.asm_pio_encode("push(noblock)", 0)
+        self._ins_pull = rp2.asm_pio_encode("pull(noblock)", 0)
+
+    def _use_sm(self, limit: Pin) -> None:
+        # Switches to the state machine of a limit switch, set up on first use
+        for pin, sm in self._sms:
+            if pin is limit:
+                self._sm = sm
+                self._limit = limit
+                return
+
+        sm = StateMachine(
+            self._sm_index + len(self._sms),
+            self.program,
+            freq=self.FREQUENCY,
+            set_base=self.pul_pin,
+            jmp_pin=limit
+        )
+        sm.irq(self._irq)
+        sm.active(1)
+        self._sms.append((limit, sm))
+        self._sm = sm
+        self._limit = limit
+
+    def _irq(self, sm) -> None:
+        # A segment ended. Skipped while the caller is inside a method,
+        # which takes the markers out itself.
+        if not self._busy:
+            self._busy = True
+            self._service()
+            self._busy = False
+
+    def _service(self) -> None:
+        # Takes the end markers out of the RX FIFO and refills the TX FIFO
+        sm = self._sm
+        while self._q_len and sm.rx_fifo():
+            left = sm.get()
+            self._finish(left)
+            if left:
+                # stopped by the limit switch
+                self.hit = True
+                self.stop()
+                return
+        self._feed()
+
+    @classmethod
+    def period_us(cls, delay: float) -> int:
+        """Actual pulse period for a delay per step
+
+        Args:
+            delay (float): seconds per step
+
+        Returns:
+            int: microseconds per step, at least OVERHEAD
+        """
+        period = max(cls.OVERHEAD, int(delay * cls.FREQUENCY))
+        return period - ((period - cls.OVERHEAD) & 1)
+
+    def move(self, steps: int, delay: float, limit: Pin, ramp=None, steer_us: int = 0) -> None:
+        """Starts a move (NON-BLOCKING)
+
+        Args:
+            steps (int): number of steps, nothing is done below 1
+            delay (float): seconds per step, ignored with a ramp
+            limit (Pin): limit switch that ends the move when high
+            ramp (src.motion.ramp, optional): speed profile. Defaults to None,
+                the whole move at delay.
+            steer_us (int, optional): cut the cruise part into segments of this
+                length, so slow_down() takes effect within a few of them. Defaults
+                to 0, a single segment.
+        """
+        busy = self._busy
+        self._busy = True
+        if self._q_len:
+            self.stop()
+        self._done = 0
+        self._t_head = 0
+        self._seg = 0
+        self._segs = 0
+        self._chunk = steer_us
+        self._slow = 0
+        self.hit = False
+        if steps < 1:
+            self._busy = busy
+            return
+        if limit is not self._limit:
+            self._use_sm(limit)
+
+        sm = self._sm
+        while sm.rx_fifo():
+            sm.get()
+        self._ramp = ramp
+        if ramp is None:
+            self._k = 0
+            self._cruise_period = __class__.period_us(delay)
+        else:
+            self._k = ramp.plan(steps)
+            self._cruise_period = ramp.cruise_period(self._k)
+            steps -= 2 * ramp.cum[self._k]
+        self._cruise = steps
+        self._segs = 2 * self._k + 1
+        self._feed()
+        self._busy = busy
+
+    def _feed(self) -> None:
+        # Queues segments while there is room in the FIFO
+        sm = self._sm
+        while self._seg < self._segs and self._q_len < self.QUEUE and sm.tx_fifo() <= 2:
+            s = self._seg
+            self._seg = s + 1
+            k = self._k
+            if s == k:
+                period = max(self._cruise_period, self._slow)
+                steps = self._cruise
+                if self._chunk and steps:
+                    steps = min(steps, max(1, self._chunk // period))
+                    if steps < self._cruise:
+                        self._seg = s
+                self._cruise -= steps
+                if steps == 0:
+                    continue
+            else:
+                if s > k:
+                    s = 2 * k - s
+                steps = self._ramp.steps[s]
+                period = max(self._ramp.periods[s], self._slow)
+            q = (self._q_head + self._q_len) % self.QUEUE
+            self._q_steps[q] = steps
+            self._q_period[q] = period
+            self._q_len += 1
+            sm.put(steps)
+            sm.put((period - self.OVERHEAD) >> 1)
+
+    def _finish(self, left: int) -> None:
+        # The running segment ended with left steps not done
+        h = self._q_head
+        steps = self._q_steps[h]
+        self._done += steps - left
+        self._t_head += steps * self._q_period[h]
+        self._q_head = (h + 1) % self.QUEUE
+        self._q_len -= 1
+
+    def moving(self) -> bool:
+        """Whether a move is still running, keeps the FIFO fed
+
+        Returns:
+            bool: False once the steps are done or the limit switch was hit,
+                hit tells the two apart
+        """
+        busy = self._busy
+        self._busy = True
+        self._service()
+        self._busy = busy
+        return self._q_len > 0
+
+    def steps_done(self, elapsed_us: int) -> int:
+        """Steps done so far, from the time since move()
+
+        The pulse rate is exact, so while moving this is the step count
+        without touching the state machine. After the move it is exact.
+
+        Args:
+            elapsed_us (int): time since move() in us
+
+        Returns:
+            int:
+        """
+        if not self.moving():
+            return self._done
+        h = self._q_head
+        n = (elapsed_us - self._t_head) // self._q_period[h]
+        return self._done + max(0, min(self._q_steps[h], n))
+
+    def slow_down(self, period: int) -> None:
+        """Raises the lowest period of the segments queued from now on until
+        the end of the move, may be called from an interrupt handler
+
+        Args:
+            period (int): us per step, even steps above OVERHEAD, ignored when not
+                above the current one
+        """
+        if period > self._slow:
+            self._slow = period
+
+    def freeze(self) -> None:
+        """Stops the pulses at once without touching the queue, so it can be
+        called from an interrupt handler. stop() completes the stop.
+        """
+        if self._q_len:
+            self._sm.active(0)
+
+    def stop(self) -> int:
+        """Stops the move at once
+
+        Returns:
+            int: steps done
+        """
+        sm = self._sm
+        busy = self._busy
+        self._busy = True
+        if self._q_len:
+            sm.active(0)
+            sm.exec(self._ins_set_low)
+            while self._q_len and sm.rx_fifo():
+                self._finish(sm.get())
+            if self._q_len:
+                # a segment whose words are still in the FIFO has not started
+                unstarted = (sm.tx_fifo() + 1) >> 1
+                sm.exec(self._ins_read_x)
+                sm.exec(self._ins_push)
+                left = sm.get()
+                if self._q_len > unstarted:
+                    self._finish(left)
+            while sm.rx_fifo():
+                sm.get()
+            self._q_len = 0
+            self._seg = self._segs
+            sm.restart()
+            while sm.tx_fifo():
+                sm.exec(self._ins_pull)
+            sm.active(1)
+        self._busy = busy
+        return self._done
+
+    # pylint: disable=E,W,C,R
+    @asm_pio(set_init=PIO.OUT_LOW)
+    def program():
+        pull(block)             # steps of the segment
+        mov(x, osr)
+        pull(block)             # delay loop count, kept in osr
+
+        label("step")
+        jmp(pin, "done")        # limit switch pressed
+        set(pins, 1)
+        jmp(x_dec, "high")      # x = steps left after this one
+        label("high")
+        mov(y, osr)
+        label("high_loop")
+        jmp(y_dec, "high_loop")
+        set(pins, 0)
+        mov(y, osr)
+        label("low_loop")
+        jmp(y_dec, "low_loop")
+        jmp(not_x, "done")
+        jmp("step")
+
+        label("done")
+        mov(isr, x)
+        push(noblock)
+        irq(noblock, rel(0))    # segment ended, see _irq()
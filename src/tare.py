@@ -0,0 +1,145 @@
+# Load cell zero (tare) engine
+#
+# Takes the initial zero as the median of the first samples, then keeps
+# following slow zero drift while the caller reports the slide as parked
+# and the reading has been stable for a while. The zero moves by at most
+# max_rate counts per minute, the pace of thermal drift, so a real load
+# that stays on the cell (a clamped string resting on the gripper) is
+# not taken for drift: it is still shown long after it appeared. Works on
+# raw HX711 counts, never blocks and never allocates in update(), so it
+# can run in the HX711 IRQ handler.
+
+from array import array
+
+class auto_zero:
+
+    def __init__(
+        self,
+        sps: int,
+        init_samples: int = 11,
+        window: int = 16,
+        stable_band: int = 2000,
+        track_band: int = 20000,
+        settle_s: int = 10,
+        max_rate: int = 200
+    ) -> None:
+        """Create a tare engine
+
+        Args:
+            sps (int): samples per second, used for the drift rate
+            init_samples (int, optional): samples for the initial median. Defaults to 11.
+            window (int, optional): samples checked for stability. Defaults to 16.
+            stable_band (int, optional): max spread (counts) of a stable window. Defaults to 2000.
+            track_band (int, optional): max zero error (counts) that is tracked. Defaults to 20000.
+            settle_s (int, optional): seconds of stable windows before the zero is
+                tracked. Defaults to 10.
+            max_rate (int, optional): fastest zero change tracked, counts per minute.
+                Defaults to 200.
+        """
+        self._init = array('i', [0] * init_samples)
+        self._ring = array('i', [0] * window)
+        self._window = window
+        self._stable_band = stable_band
+        self._track_band = track_band
+        self._settle = settle_s * sps
+        # one step of _step_size counts every _step_every samples
+        self._step_every = max(1, 60 * sps // max(1, max_rate))
+        self._step_size = max(1, max_rate // (60 * sps))
+        self._drift_samples = sps * 10
+        self._drift_scale = 60 * sps
+        self.offset: int = 0
+        self.drift: int = 0    # counts per minute
+        self.stable: bool = False
+        self.restart()
+
+    def restart(self) -> None:
+        """Takes a new initial zero from the next samples
+        """
+        self.ready: bool = False
+        self.stable = False
+        self._stable_n = 0
+        self._tick = 0
+        self._count = 0
+        self._idx = 0
+        self._sum = 0
+        self._filled = 0
+        for i in range(self._window):
+            self._ring[i] = 0
+        self._drift_count = 0
+        self._drift_offset = self.offset
+
+    def update(self, raw: int, parked: bool) -> int|None:
+        """Adds a raw sample and returns it relative to the current zero
+
+        Args:
+            raw (int): raw HX711 value
+            parked (bool): the slide is at rest at its standby position
+
+        Returns:
+            int|None: None is returned until the initial zero is known, the
+                sample that completes it already gets a value
+        """
+        if not self.ready:
+            self._take_initial(raw)
+            return raw - self.offset if self.ready else None
+
+        ring = self._ring
+        i = self._idx
+        self._sum += raw - ring[i]
+        ring[i] = raw
+        i += 1
+        self._idx = 0 if i == self._window else i
+        if self._filled < self._window:
+            self._filled += 1
+
+        if parked and self._filled == self._window:
+            lo = hi = raw
+            for v in ring:
+                if v < lo: lo = v
+                elif v > hi: hi = v
+            self.stable = (hi - lo) <= self._stable_band
+        else:
+            self.stable = False
+
+        if not self.stable:
+            self._stable_n = 0
+        elif self._stable_n < self._settle:
+            self._stable_n += 1
+        else:
+            self._tick += 1
+            if self._tick >= self._step_every:
+                self._tick = 0
+                err = self._sum // self._window - self.offset
+                if -self._track_band < err < self._track_band:
+                    step = min(abs(err), self._step_size)
+                    self.offset += step if err > 0 else -step
+
+        self._drift_count += 1
+        if self._drift_count == self._drift_samples:
+            self.drift = (self.offset - self._drift_offset) * self._drift_scale // self._drift_samples
+            self._drift_offset = self.offset
+            self._drift_count = 0
+
+        return raw - self.offset
+
+    def _take_initial(self, raw: int) -> None:
+        """Collects samples for the initial zero and takes their median
+
+        Args:
+            raw (int): raw HX711 value
+        """
+        buf = self._init
+        n = self._count
+        # insertion sort as the samples arrive
+        j = n
+        while j > 0 and buf[j - 1] > raw:
+            buf[j] = buf[j - 1]
+            j -= 1
+        buf[j] = raw
+        n += 1
+        if n == len(buf):
+            self.offset = buf[n >> 1]
+            self._drift_offset = self.offset
+            self.ready = True
+            n = 0
+        self._count = n
@@ -0,0 +1,39 @@
+# src/calib.py calibration tables with repeated raw values
+#
+# cal_table_read() in main.py always puts (0, 0) in front of the user's
+# points, so a table line at zero repeats the origin. Repeats keep the
+# first point, and a table that cannot be built leaves the converter as
+# it was.
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.calib import raw_to_gram
+
+def test_repeated_origin():
+    conv = raw_to_gram(20.0)
+    conv.set_table([(0, 0), (0, 0), (100000, 1200)])
+    assert conv._table == [(0, 0), (100000, 1200)]
+    conv.set_table([(0, 0), (0, 5), (100000, 1200)])
+    assert conv.convert(0) == 0
+    assert abs(conv.convert(50000) - 600) <= 1
+
+def test_repeated_point():
+    conv = raw_to_gram(20.0)
+    conv.set_table([(0, 0), (5000, 100), (5000, 110)])
+    assert conv._table == [(0, 0), (5000, 100)]
+    assert abs(conv.convert(2500) - 50) <= 1
+
+def test_failed_table_keeps_converter():
+    conv = raw_to_gram(20.0)
+    conv.set_table([(0, 0), (100000, 1200)])
+    before = conv.convert(50000)
+    with pytest.raises(ValueError):
+        conv.set_table([(0, 0), (0, 5)])
+    with pytest.raises(ValueError):
+        conv._build([(0, 0), (0.5, 3), (100000, 1200)])
+    assert conv._table == [(0, 0), (100000, 1200)]
+    assert conv.convert(50000) == before
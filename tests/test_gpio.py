@@ -0,0 +1,86 @@
+# src/gpio.py against a fake SIO register file
+#
+# Replays the masked GPIO_OUT_XOR writes of port.write() and
+# port.write_seq() on a register file that only knows GPIO_OUT, its XOR
+# alias and a TIMERAWL that ticks once per access, and checks that the
+# pins outside a port never change, that the rows of a table come out in
+# order and that each is held for hold_us.
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim
+sim.install()
+
+from src.gpio import port, GPIO_OUT, GPIO_OUT_XOR, TIMER_RAWL
+
+MOTO_PINS = [4, 5, 2, 3]
+MOTO_FORW_W = [[1, 0, 1, 0], [0, 1, 0, 0], [0, 1, 1, 1], [1, 0, 1, 0]]
+MOTO_BACK_W = [[0, 1, 0, 1], [1, 0, 0, 1], [1, 0, 1, 0], [0, 1, 1, 0]]
+OTHERS = 0x2a5a5a5a     # levels of the pins outside the port
+
+class fake_sio:
+
+    def __init__(self, out: int = 0) -> None:
+        self.out = out
+        self.now = 0xfffffff0   # TIMERAWL, one microsecond per access, wraps soon
+        self.history = []   # GPIO_OUT after every write
+        self.times = []     # TIMERAWL at every write
+
+    def __getitem__(self, addr: int) -> int:
+        self.now = (self.now + 1) & 0xffffffff
+        if addr == TIMER_RAWL:
+            return self.now
+        assert addr == GPIO_OUT
+        return self.out
+
+    def __setitem__(self, addr: int, value: int) -> None:
+        assert addr == GPIO_OUT_XOR
+        self.out ^= value
+        self.history.append(self.out)
+        self.times.append(self.now)
+
+def levels(out: int, pins: list) -> list:
+    return [(out >> gpio) & 1 for gpio in pins]
+
+def test_write_seq_phases_in_order():
+    for rows in (MOTO_FORW_W, MOTO_BACK_W):
+        regs = fake_sio(OTHERS)
+        p = port(MOTO_PINS, regs)
+        p.write_seq(p.table(rows))
+        assert len(regs.history) == len(rows)
+        for out, row in zip(regs.history, rows):
+            assert levels(out, MOTO_PINS) == row
+            assert out & ~p.mask == OTHERS & ~p.mask
+
+def test_write_seq_holds_phases():
+    for hold in (1, 3, 20):
+        regs = fake_sio(OTHERS)
+        p = port(MOTO_PINS, regs, hold_us=hold)
+        p.write_seq(p.table(MOTO_FORW_W))
+        for out, row in zip(regs.history, MOTO_FORW_W):
+            assert levels(out, MOTO_PINS) == row
+        for t0, t1 in zip(regs.times, regs.times[1:]):
+            assert (t1 - t0) & 0xffffffff >= hold
+
+def test_write_leaves_other_pins():
+    regs = fake_sio(OTHERS)
+    p = port(MOTO_PINS, regs)
+    for row in MOTO_FORW_W + MOTO_BACK_W:
+        p.write(p.bits(row))
+        assert levels(regs.out, MOTO_PINS) == row
+        assert regs.out & ~p.mask == OTHERS & ~p.mask
+
+def test_write_mask_limits_pins():
+    regs = fake_sio(OTHERS)
+    leds = port([19, 20, 21], regs)
+    g, y, r = leds.bit(0), leds.bit(1), leds.bit(2)
+    leds.write(g | y | r)
+    leds.write(g, g | y)    # green on, yellow off, red untouched
+    assert levels(regs.out, [19, 20, 21]) == [1, 0, 1]
+    assert regs.out & ~leds.mask == OTHERS & ~leds.mask
+    # a mask bit outside the port is ignored
+    leds.write(0, 1 << 4)
+    assert levels(regs.out, [19, 20, 21]) == [1, 0, 1]
+    assert regs.out & ~leds.mask == OTHERS & ~leds.mask
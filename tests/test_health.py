@@ -0,0 +1,63 @@
+# src/health.py sample rate checks on a made-up drain timeline
+#
+# The HX711 IRQ handler calls update() with the ticks_us time of each
+# drain; here the times are generated for a sensor at a given rate, with
+# or without a stall, and check() is asked between drains.
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim
+sim.install()
+
+from sim import utime
+import src.health
+src.health.time = utime     # ticks_us() and ticks_diff()
+
+from src.health import sample_health
+
+SPS = 80
+
+def run(health: sample_health, now: int, sps: int, seconds: float) -> tuple:
+    # drains one sample at a time at sps, returns the time and the number of
+    # checks that failed
+    period = 1000000 // sps
+    faults = 0
+    for i in range(int(seconds * sps)):
+        now += period
+        health.update(now, 1)
+        if not health.check(now + period // 2):
+            faults += 1
+    return now, faults
+
+def test_nominal_rate():
+    health = sample_health(SPS, 80)
+    health.restart(0)
+    now, faults = run(health, 0, SPS, 3)
+    assert faults == 0
+    assert abs(health.rate - SPS) <= 1
+
+def test_short_stall_clears():
+    health = sample_health(SPS, 80)
+    health.restart(0)
+    now, faults = run(health, 0, SPS, 2)
+    assert not health.check(now + 200000)   # stalled while the gap lasts
+    now += 200000
+    health.update(now, 1)
+    now, faults = run(health, now, SPS, 2)
+    assert faults == 0
+    assert abs(health.rate - SPS) <= 1
+
+def test_slow_sensor_faults():
+    for sps in (10, 15):
+        health = sample_health(SPS, 80)
+        health.restart(0)
+        now, faults = run(health, 0, SPS, 2)
+        now, faults = run(health, now, sps, 3)
+        assert abs(health.rate - sps) <= 1
+        assert not health.check(now)
+        assert not health.healthy
+        # the fault holds between drains, not only during the gaps
+        now, faults = run(health, now, sps, 2)
+        assert faults == 2 * sps
@@ -0,0 +1,138 @@
+# src/pico_i2c_lcd.py against the per-byte PCF8574 encoding
+#
+# Records every byte the driver hands to I2C.writeto() and checks it
+# against a copy of the original driver, which wrote each expander port
+# state with its own writeto(): init, clear, move_to, putstr (wraps and
+# newlines), custom chars and backlight. hal_write_chars() is checked
+# around the BURST boundaries, where a run is split over several
+# writeto() calls from the same buffer.
+
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import sim
+sim.install()
+
+from sim import utime
+import lcd_api
+lcd_api.time = utime    # hal_sleep_us() of custom_char()
+
+from src.pico_i2c_lcd import I2cLcd, MASK_RS, MASK_E, SHIFT_BACKLIGHT, SHIFT_DATA
+
+ADDR = 0x27
+ROWS = 4
+COLS = 20
+SMILEY = [0x00, 0x0a, 0x0a, 0x00, 0x11, 0x0e, 0x00, 0x00]
+
+class fake_i2c:
+
+    def __init__(self) -> None:
+        self.writes = []    # bytes of every writeto(), copied when sent
+
+    def writeto(self, addr: int, buf) -> None:
+        assert addr == ADDR
+        self.writes.append(bytes(buf))
+
+    def stream(self) -> bytes:
+        return b''.join(self.writes)
+
+class baseline_lcd(I2cLcd):
+
+    # The original driver: one writeto() per port state, no burst
+
+    def hal_write_init_nibble(self, nibble):
+        byte = ((nibble >> 4) & 0x0f) << SHIFT_DATA
+        self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
+        self.i2c.writeto(self.i2c_addr, bytes([byte]))
+
+    def hal_backlight_on(self):
+        self.i2c.writeto(self.i2c_addr, bytes([1 << SHIFT_BACKLIGHT]))
+
+    def hal_backlight_off(self):
+        self.i2c.writeto(self.i2c_addr, bytes([0]))
+
+    def _byte(self, value, rs):
+        for nibble in ((value >> 4) & 0x0f, value & 0x0f):
+            byte = rs | (self.backlight << SHIFT_BACKLIGHT) | (nibble << SHIFT_DATA)
+            self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
+            self.i2c.writeto(self.i2c_addr, bytes([byte]))
+
+    def hal_write_command(self, cmd):
+        self._byte(cmd, 0)
+
+    def hal_write_data(self, data):
+        self._byte(data, MASK_RS)
+
+    def hal_write_chars(self, string):
+        for char in string:
+            self.hal_write_data(ord(char))
+
+def pair() -> tuple:
+    new = I2cLcd(fake_i2c(), ADDR, ROWS, COLS)
+    old = baseline_lcd(fake_i2c(), ADDR, ROWS, COLS)
+    return new, old
+
+def test_init():
+    new, old = pair()
+    assert new.i2c.stream() == old.i2c.stream()
+    # the reset byte, then each init nibble as one writeto() of E high, E low
+    assert new.i2c.writes[0] == old.i2c.writes[0]
+    for i in range(4):
+        assert new.i2c.writes[1 + i] == old.i2c.writes[1 + 2 * i] + old.i2c.writes[2 + 2 * i]
+    assert len(new.i2c.writes) < len(old.i2c.writes)
+
+def test_calls():
+    new, old = pair()
+    for lcd in (new, old):
+        lcd.i2c.writes.clear()
+        lcd.clear()
+        lcd.move_to(3, 1)
+        lcd.putstr('LB: 18.0/18.0')
+        lcd.move_to(15, 2)
+        lcd.putstr('wraps to the next line')     # wrap at the end of line 2
+        lcd.putstr('\n\nA\nB')                   # newline right after a wrap
+        lcd.move_to(0, 3)
+        lcd.putstr('x' * 45)                     # wraps to line 0, over BURST
+        lcd.custom_char(2, SMILEY)
+        lcd.putstr(chr(2))
+        lcd.blink_cursor_on()
+        lcd.hide_cursor()
+        lcd.backlight_off()
+        lcd.putstr('dark')
+        lcd.backlight_on()
+        lcd.putstr('')
+    assert new.i2c.stream() == old.i2c.stream()
+    assert len(new.i2c.writes) < len(old.i2c.writes)
+    assert new.addr_cursor() == old.addr_cursor()
+
+def test_burst():
+    for n in (1, 2, I2cLcd.BURST - 1, I2cLcd.BURST, I2cLcd.BURST + 1,
+              2 * I2cLcd.BURST, 2 * I2cLcd.BURST + 5):
+        new, old = pair()
+        text = ''.join(chr(32 + i % 95) for i in range(n))
+        new.i2c.writes.clear()
+        old.i2c.writes.clear()
+        new.hal_write_chars(text)
+        old.hal_write_chars(text)
+        assert new.i2c.stream() == old.i2c.stream(), n
+        assert len(old.i2c.writes) == 4 * n
+        assert len(new.i2c.writes) == (n + I2cLcd.BURST - 1) // I2cLcd.BURST, n
+        assert all(len(w) <= 4 * I2cLcd.BURST for w in new.i2c.writes)
+
+def test_single_byte():
+    # a command or a data byte is one writeto() of its four port states
+    new, old = pair()
+    for value in (0x00, 0x0f, 0x5a, 0xa5, 0xf0, 0xff):
+        for rs in (0, 1):
+            new.i2c.writes.clear()
+            old.i2c.writes.clear()
+            if rs:
+                new.hal_write_data(value)
+                old.hal_write_data(value)
+            else:
+                new.hal_write_command(value)
+                old.hal_write_command(value)
+            assert new.i2c.writes == [old.i2c.stream()]